@@ -1,7 +1,16 @@
 from fastapi import APIRouter, Depends
 
 from meilisync_admin.api import action_log as action_log_api
-from meilisync_admin.api import admin, auth, init, meilisearch, source, stat, sync
+from meilisync_admin.api import (
+    admin,
+    auth,
+    init,
+    meilisearch,
+    scheduler,
+    source,
+    stat,
+    sync,
+)
 from meilisync_admin.depends import action_log, auth_required, set_i18n
 
 router = APIRouter(dependencies=[Depends(set_i18n)])
@@ -14,6 +23,7 @@ auth_router.include_router(
 )
 auth_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
 auth_router.include_router(stat.router, prefix="/stat", tags=["Stat"])
+auth_router.include_router(scheduler.router, prefix="/scheduler", tags=["Scheduler"])
 auth_router.include_router(
     action_log_api.router, prefix="/action_log", tags=["ActionLog"]
 )
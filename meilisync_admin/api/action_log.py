@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.pagination import paginate
 from meilisync_admin.models import ActionLog
-from meilisync_admin.schema.request import Query
+from meilisync_admin.schema.request import CursorQuery
 
 router = APIRouter()
 
@@ -11,7 +13,7 @@ async def get_actions_logs(
     admin_id: int | None = None,
     method: str | None = None,
     path: str | None = None,
-    query: Query = Depends(Query),
+    query: CursorQuery = Depends(CursorQuery),
 ):
     qs = ActionLog.all()
     if admin_id:
@@ -20,12 +22,11 @@ async def get_actions_logs(
         qs = qs.filter(method=method)
     if path:
         qs = qs.filter(path__icontains=path)
-    total = await qs.count()
-    data = await qs.limit(query.limit).offset(query.offset).order_by(*query.orders)
-    return {"total": total, "data": data}
+    return await paginate(qs, query, filtered=bool(admin_id or method or path))
 
 
 @router.delete("/{pks}")
 async def delete_action_logs(pks: str):
     id_list = [int(pk) for pk in pks.split(",")]
-    await ActionLog.filter(id__in=id_list).delete()
+    deleted = await ActionLog.filter(id__in=id_list).delete()
+    await Counter.incr("action_log", -deleted)
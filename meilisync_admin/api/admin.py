@@ -9,6 +9,7 @@ from tortoise.expressions import Q
 from meilisync_admin import auth
 from meilisync_admin.auth import access_security, get_password_hash
 from meilisync_admin.depends import get_current_admin, superuser_required
+from meilisync_admin.libs.counter import Counter
 from meilisync_admin.models import Admin
 from meilisync_admin.schema.request import Query
 
@@ -47,6 +48,7 @@ async def get_me(
 async def delete_admins(pks: str):
     id_list = [int(pk) for pk in pks.split(",")]
     await Admin.filter(id__in=id_list).delete()
+    await Counter.reset("admin", "action_log")
 
 
 class CreateAdminBody(BaseModel):
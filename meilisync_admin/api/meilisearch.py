@@ -1,9 +1,19 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from starlette.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_409_CONFLICT
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
+)
 from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
 
-from meilisync_admin.models import Meilisearch
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.models import Meilisearch, Sync
+from meilisync_admin.scheduler import Scheduler
 from meilisync_admin.schema.request import Query
 
 router = APIRouter()
@@ -33,6 +43,8 @@ class Body(BaseModel):
     api_url: str
     insert_size: int | None
     insert_interval: int | None
+    adaptive_batch: bool = False
+    target_lag: int | None = None
 
 
 @router.post(
@@ -52,11 +64,75 @@ async def create(
         )
 
 
+class BulkUpdateBody(Body):
+    id: int
+
+
+@router.post(
+    "/bulk",
+    status_code=HTTP_201_CREATED,
+    summary="批量创建meilisearch",
+    description="在一个事务中创建，如果任一记录已存在则全部回滚并返回`409`",
+)
+async def bulk_create(body: List[Body]):
+    try:
+        async with in_transaction():
+            await Meilisearch.bulk_create([Meilisearch(**item.dict()) for item in body])
+    except IntegrityError:
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT, detail="Meilisearch already exists"
+        )
+    await Counter.incr("meilisearch", len(body))
+
+
+@router.put(
+    "/bulk",
+    status_code=HTTP_204_NO_CONTENT,
+    summary="批量更新meilisearch",
+    description="在一个事务中更新，如果更新后任一记录已存在则全部回滚并返回`409`",
+)
+async def bulk_update(body: List[BulkUpdateBody]):
+    items = {item.id: item for item in body}
+    meilisearches = await Meilisearch.filter(pk__in=list(items))
+    missing = set(items) - {m.pk for m in meilisearches}
+    if missing:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Meilisearch {', '.join(map(str, sorted(missing)))} not found",
+        )
+    for m in meilisearches:
+        m.update_from_dict(items[m.pk].dict(exclude={"id"}))
+    try:
+        async with in_transaction():
+            await Meilisearch.bulk_update(meilisearches, fields=list(Body.model_fields))
+    except IntegrityError:
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT, detail="Meilisearch already exists"
+        )
+    rows = (
+        await Sync.filter(meilisearch_id__in=list(items)).distinct().values("source_id")
+    )
+    source_ids = sorted(row["source_id"] for row in rows)
+    await Scheduler.restart_sources(source_ids)
+    await Scheduler.invalidate_meilisearch(list(items))
+
+
 @router.delete("/{pks}", status_code=HTTP_204_NO_CONTENT, summary="删除meilisearch")
 async def delete(pks: str):
-    for pk in pks.split(","):
-        m = await Meilisearch.get(pk=pk)
-        await m.delete()
+    meilisearch_ids = [int(pk) for pk in pks.split(",")]
+    rows = (
+        await Sync.filter(meilisearch_id__in=meilisearch_ids)
+        .distinct()
+        .values("source_id")
+    )
+    source_ids = sorted(row["source_id"] for row in rows)
+    async with in_transaction():
+        deleted = await Meilisearch.filter(pk__in=meilisearch_ids).delete()
+    # a filtered delete sends no signals, so the sources are reloaded once here
+    await Counter.incr("meilisearch", -deleted)
+    await Counter.reset("sync", "sync_log")
+    await Scheduler.reload_sources(source_ids)
+    await Scheduler.invalidate_meilisearch(meilisearch_ids)
 
 
 @router.put(
@@ -0,0 +1,114 @@
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from meilisync_admin.scheduler import Scheduler
+
+router = APIRouter()
+
+SOURCE_METRICS = [
+    ("meilisync_source_up", "Whether the source runner is running", "up"),
+    ("meilisync_source_queue_depth", "Events waiting to be dispatched", "depth"),
+    (
+        "meilisync_source_queue_bytes",
+        "Bytes of events waiting to be dispatched",
+        "bytes",
+    ),
+    (
+        "meilisync_source_spool_length",
+        "Events in the durable spool",
+        "spool_length",
+    ),
+    (
+        "meilisync_source_spool_age_seconds",
+        "Seconds the oldest spooled event has been waiting",
+        "spool_age",
+    ),
+]
+SYNC_METRICS = [
+    (
+        "meilisync_sync_events_per_second",
+        "Events dispatched to the sync per second",
+        "events_per_second",
+    ),
+    (
+        "meilisync_sync_acked_per_second",
+        "Events accepted by Meilisearch per second",
+        "acked_per_second",
+    ),
+    ("meilisync_sync_queue_depth", "Events waiting for the sync worker", "queue_depth"),
+    (
+        "meilisync_sync_pending_events",
+        "Events buffered for the next insert",
+        "pending_events",
+    ),
+    (
+        "meilisync_sync_dedup_ratio",
+        "Share of buffered events merged into an earlier event of the same document",
+        "dedup_ratio",
+    ),
+    (
+        "meilisync_sync_in_flight_batches",
+        "Batches sent to Meilisearch whose tasks are not finished",
+        "in_flight_batches",
+    ),
+    ("meilisync_sync_batch_size", "Events per insert batch", "batch_size"),
+    (
+        "meilisync_sync_batch_interval_seconds",
+        "Seconds between insert batches",
+        "batch_interval",
+    ),
+]
+
+
+def _format_labels(labels: Dict[str, str]):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def _render(name: str, help_: str, type_: str, samples: List[Tuple[dict, float]]):
+    lines = [f"# HELP {name} {help_}", f"# TYPE {name} {type_}"]
+    for labels, value in samples:
+        lines.append(f"{name}{{{_format_labels(labels)}}} {value}")
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    source_samples: Dict[str, list] = {name: [] for name, _, _ in SOURCE_METRICS}
+    sync_samples: Dict[str, list] = {name: [] for name, _, _ in SYNC_METRICS}
+    lag_samples = []
+    for node in await Scheduler.get_nodes():
+        for source_id, status in node["sources"].items():
+            labels = {"node": node["id"], "source_id": source_id}
+            values = {"up": int(status.get("state") == "running")}
+            values.update(status.get("queue", {}))
+            for key, value in (status.get("spool") or {}).items():
+                values[f"spool_{key}"] = value
+            for name, _, key in SOURCE_METRICS:
+                if key in values:
+                    source_samples[name].append((labels, values[key]))
+            for sync_id, sync_status in status.get("syncs", {}).items():
+                sync_labels = {**labels, "sync_id": sync_id}
+                sync_metrics = sync_status["metrics"]
+                for name, _, key in SYNC_METRICS:
+                    if sync_metrics.get(key) is not None:
+                        sync_samples[name].append((sync_labels, sync_metrics[key]))
+                for quantile, value in sync_metrics["lag_seconds"].items():
+                    if value is not None:
+                        quantile = str(int(quantile[1:]) / 100)
+                        lag_samples.append(
+                            ({**sync_labels, "quantile": quantile}, value)
+                        )
+    lines = []
+    for name, help_, _ in SOURCE_METRICS:
+        lines += _render(name, help_, "gauge", source_samples[name])
+    for name, help_, _ in SYNC_METRICS:
+        lines += _render(name, help_, "gauge", sync_samples[name])
+    lines += _render(
+        "meilisync_sync_lag_seconds",
+        "Seconds from reading an event to Meilisearch accepting it",
+        "summary",
+        lag_samples,
+    )
+    return "\n".join(lines) + "\n"
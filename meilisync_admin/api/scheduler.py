@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from meilisync_admin.scheduler import Scheduler
+
+router = APIRouter()
+
+
+@router.get(
+    "/nodes",
+    summary="获取调度节点列表",
+    description="包括每个存活节点的心跳时间和其负责同步的数据源",
+)
+async def get_nodes():
+    return await Scheduler.get_nodes()
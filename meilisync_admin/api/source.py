@@ -1,4 +1,5 @@
-from typing import Dict, Optional
+import asyncio
+from typing import Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from meilisync.discover import get_source
@@ -7,11 +8,19 @@ from pydantic import BaseModel
 from starlette.status import (
     HTTP_201_CREATED,
     HTTP_204_NO_CONTENT,
+    HTTP_404_NOT_FOUND,
     HTTP_412_PRECONDITION_FAILED,
 )
+from tortoise.transactions import in_transaction
 
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.source import ping
+from meilisync_admin.libs.source_pool import SourcePool
+from meilisync_admin.libs.spool import Spool
 from meilisync_admin.models import Source
+from meilisync_admin.scheduler import Scheduler
 from meilisync_admin.schema.request import Query
+from meilisync_admin.settings import settings
 
 router = APIRouter()
 
@@ -21,11 +30,26 @@ class CheckBody(BaseModel):
     connection: Dict
 
 
+async def _check_postgres(connection: dict):
+    # the pooled entries only hold a plain connection, so the replication
+    # connection the runner needs is opened once here and closed right after
+    source_obj = await asyncio.get_running_loop().run_in_executor(
+        None,
+        lambda: get_source(SourceType.postgres)(progress={}, tables=[], **connection),
+    )
+    try:
+        return await source_obj.ping()
+    finally:
+        source_obj.conn.close()  # type: ignore
+        source_obj.conn_dict.close()  # type: ignore
+
+
 async def check_source(body: CheckBody):
-    source_cls = get_source(body.type)
-    source = source_cls(progress={}, tables=[], **body.connection)
     try:
-        return await source.ping()
+        if body.type == SourceType.postgres:
+            return await _check_postgres(body.connection)
+        async with SourcePool.acquire(body.type, body.connection) as source_obj:
+            return await ping(source_obj)
     except Exception as e:
         raise HTTPException(status_code=HTTP_412_PRECONDITION_FAILED, detail=str(e))
 
@@ -51,6 +75,17 @@ async def get_list(
     return dict(total=total, data=data)
 
 
+@router.get(
+    "/{pk}/status",
+    summary="获取数据源同步状态",
+    description="包括运行状态（运行中、退避重试中、熔断中）、最近错误、下次重试时间，"
+    "事件队列的当前深度、内存占用和历史最高值，以及启用持久化缓冲时缓冲中的事件数和最早事件的等待秒数",
+)
+async def get_status(pk: int):
+    source = await Source.get(pk=pk)
+    return await Scheduler.get_status(source.pk)
+
+
 class Body(CheckBody):
     label: str
 
@@ -68,6 +103,49 @@ async def create(
     await Source.create(**body.dict())
 
 
+class BulkUpdateBody(Body):
+    id: int
+
+
+@router.post(
+    "/bulk",
+    status_code=HTTP_201_CREATED,
+    summary="批量创建数据源",
+    description="会检查所有数据源是否可用，如果任一不可用则返回`412`，然后在一个事务中创建",
+)
+async def bulk_create(body: List[Body]):
+    await asyncio.gather(*[check_source(item) for item in body])
+    async with in_transaction():
+        await Source.bulk_create([Source(**item.dict()) for item in body])
+    # new sources are started by the scheduler nodes on their next rebalance
+    await Counter.incr("source", len(body))
+
+
+@router.put(
+    "/bulk",
+    status_code=HTTP_204_NO_CONTENT,
+    summary="批量更新数据源",
+    description="会检查所有数据源是否可用，如果任一不可用则返回`412`，然后在一个事务中更新",
+)
+async def bulk_update(body: List[BulkUpdateBody]):
+    items = {item.id: item for item in body}
+    sources = await Source.filter(pk__in=list(items))
+    missing = set(items) - {source.pk for source in sources}
+    if missing:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Source {', '.join(map(str, sorted(missing)))} not found",
+        )
+    await asyncio.gather(*[check_source(item) for item in body])
+    for source in sources:
+        source.update_from_dict(items[source.pk].dict(exclude={"id"}))
+    async with in_transaction():
+        await Source.bulk_update(sources, fields=list(Body.model_fields))
+    for pk in items:
+        await SourcePool.evict(pk=pk)
+    await Scheduler.restart_sources(sorted(items))
+
+
 class UpdateBody(BaseModel):
     label: Optional[str]
     type: Optional[SourceType]
@@ -93,6 +171,15 @@ async def update(
 
 @router.delete("/{pks}", status_code=HTTP_204_NO_CONTENT, summary="删除数据源")
 async def delete(pks: str):
-    for pk in pks.split(","):
-        source = await Source.get(pk=pk)
-        await source.delete()
+    source_ids = [int(pk) for pk in pks.split(",")]
+    async with in_transaction():
+        deleted = await Source.filter(pk__in=source_ids).delete()
+    # a filtered delete sends no signals, so the sources are stopped once here
+    await Counter.incr("source", -deleted)
+    await Counter.reset("sync", "sync_log")
+    for pk in source_ids:
+        await SourcePool.evict(pk=pk)
+    # the runners must stop appending before their spools are dropped
+    await Scheduler.remove_sources(source_ids, wait=settings.SPOOL_ENABLED)
+    for pk in source_ids:
+        await Spool.reset(pk)
@@ -1,35 +1,88 @@
+import asyncio
 import datetime
+import json
 
 from fastapi import APIRouter
 from tortoise.expressions import RawSQL
-from tortoise.functions import Count
+from tortoise.functions import Sum
 
-from meilisync_admin.models import ActionLog, Admin, Meilisearch, Source, Sync, SyncLog
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.redis import Key, r
+from meilisync_admin.models import (
+    ActionLog,
+    Admin,
+    Meilisearch,
+    Source,
+    Sync,
+    SyncLog,
+    SyncLogDaily,
+)
+from meilisync_admin.rollup import get_rolled_until
+from meilisync_admin.settings import settings
 
 router = APIRouter()
 
 
+async def get_sync_logs(start_date: datetime.date, end_date: datetime.date):
+    counts = {}
+    rows = (
+        await SyncLogDaily.filter(date__gte=start_date, date__lte=end_date)
+        .annotate(total=Sum("count"))
+        .group_by("type", "date")
+        .values("type", "date", "total")
+    )
+    for row in rows:
+        counts[(row["type"], str(row["date"]))] = row["total"]
+    # the hours not rolled up yet are read from the raw sync logs
+    start = datetime.datetime.combine(start_date, datetime.time())
+    rolled_until = await get_rolled_until()
+    if rolled_until:
+        start = max(start, rolled_until.replace(tzinfo=None))
+    rows = (
+        await SyncLog.filter(
+            created_at__gte=start,
+            created_at__lt=end_date + datetime.timedelta(days=1),
+        )
+        .annotate(total=Sum("count"), date=RawSQL("date(created_at)"))
+        .group_by("type", "date")
+        .values("type", "date", "total")
+    )
+    for row in rows:
+        key = (row["type"], str(row["date"]))
+        counts[key] = counts.get(key, 0) + row["total"]
+    return [
+        {"type": type_, "date": date, "count": count}
+        for (type_, date), count in counts.items()
+    ]
+
+
 @router.get("")
 async def get_stats(
     start_date: datetime.date,
     end_date: datetime.date,
 ):
-    source_count = await Source.all().count()
-    sync_count = await Sync.all().count()
-    sync_log_count = await SyncLog.all().count()
-    admin_count = await Admin.filter(is_active=True).count()
-    action_log_count = await ActionLog.all().count()
-    sync_logs = (
-        await SyncLog.filter(
-            created_at__gte=start_date,
-            created_at__lte=end_date + datetime.timedelta(days=1),
-        )
-        .annotate(count=Count("id"), date=RawSQL("date(created_at)"))
-        .group_by("type", "date")
-        .values("type", "count", "date")
+    key = Key.stat.format(start_date=start_date, end_date=end_date)
+    cached = await r.get(key)
+    if cached:
+        return json.loads(cached)
+    (
+        source_count,
+        sync_count,
+        sync_log_count,
+        admin_count,
+        action_log_count,
+        sync_logs,
+        meili_count,
+    ) = await asyncio.gather(
+        Counter.get("source", Source.all().count),
+        Counter.get("sync", Sync.all().count),
+        Counter.get("sync_log", SyncLog.all().count),
+        Counter.get("admin", Admin.filter(is_active=True).count),
+        Counter.get("action_log", ActionLog.all().count),
+        get_sync_logs(start_date, end_date),
+        Counter.get("meilisearch", Meilisearch.all().count),
     )
-    meili_count = await Meilisearch.all().count()
-    return {
+    ret = {
         "admin_count": admin_count,
         "action_log_count": action_log_count,
         "source_count": source_count,
@@ -38,3 +91,5 @@ async def get_stats(
         "sync_logs": sync_logs,
         "meili_count": meili_count,
     }
+    await r.set(key, json.dumps(ret, default=str), ex=settings.STAT_CACHE_EXPIRE)
+    return ret
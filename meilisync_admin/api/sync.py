@@ -1,16 +1,34 @@
+import asyncio
+import json
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException
 from loguru import logger
 from meilisearch_python_sdk.models.settings import MeilisearchSettings
 from meilisync.enums import EventType
 from pydantic import BaseModel
 from starlette.background import BackgroundTasks
-from starlette.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_409_CONFLICT
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
+)
 from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
 
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.full_sync import FullSync
+from meilisync_admin.libs.pagination import paginate
 from meilisync_admin.libs.redis import Key, r
-from meilisync_admin.models import Sync, SyncLog
+from meilisync_admin.libs.spool import Spool
+from meilisync_admin.libs.sync_count import SyncCount
+from meilisync_admin.models import Meilisearch, Sync, SyncLog
 from meilisync_admin.scheduler import Runner, Scheduler
-from meilisync_admin.schema.request import Query
+from meilisync_admin.schema.request import CursorQuery, Query
+from meilisync_admin.settings import settings
 
 router = APIRouter()
 
@@ -76,6 +94,69 @@ async def create(
         raise HTTPException(status_code=HTTP_409_CONFLICT, detail="Sync already exists")
 
 
+class BulkUpdateBody(Body):
+    id: int
+
+
+async def _set_meilisearch(syncs: List[Sync]):
+    meilisearch_map = {
+        m.pk: m
+        for m in await Meilisearch.filter(
+            pk__in={sync.meilisearch_id for sync in syncs}  # type: ignore
+        )
+    }
+    for sync in syncs:
+        sync.meilisearch = meilisearch_map[sync.meilisearch_id]  # type: ignore
+
+
+@router.post(
+    "/bulk",
+    status_code=HTTP_201_CREATED,
+    summary="批量创建同步",
+    description="在一个事务中创建，如果任一同步记录已存在则全部回滚并返回`409`",
+)
+async def bulk_create(body: List[Body]):
+    syncs = [Sync(**item.model_dump()) for item in body]
+    try:
+        async with in_transaction():
+            await Sync.bulk_create(syncs)
+    except IntegrityError:
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail="Sync already exists")
+    await _set_meilisearch(syncs)
+    await asyncio.gather(*[sync.create_index() for sync in syncs])
+    await Counter.incr("sync", len(syncs))
+    await Scheduler.reload_sources(sorted({item.source_id for item in body}))
+
+
+@router.put(
+    "/bulk",
+    status_code=HTTP_204_NO_CONTENT,
+    summary="批量更新同步",
+    description="在一个事务中更新，如果更新后任一同步记录已存在则全部回滚并返回`409`",
+)
+async def bulk_update(body: List[BulkUpdateBody]):
+    items = {item.id: item for item in body}
+    syncs = await Sync.filter(pk__in=list(items))
+    missing = set(items) - {sync.pk for sync in syncs}
+    if missing:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Sync {', '.join(map(str, sorted(missing)))} not found",
+        )
+    source_ids = {sync.source_id for sync in syncs}  # type: ignore
+    for sync in syncs:
+        sync.update_from_dict(items[sync.pk].model_dump(exclude={"id"}))
+    try:
+        async with in_transaction():
+            await Sync.bulk_update(syncs, fields=list(Body.model_fields))
+    except IntegrityError:
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail="Sync already exists")
+    await _set_meilisearch(syncs)
+    await asyncio.gather(*[sync.update_settings() for sync in syncs])
+    source_ids |= {item.source_id for item in body}
+    await Scheduler.reload_sources(sorted(source_ids))
+
+
 @router.post(
     "/{pk}/refresh",
     summary="刷新同步",
@@ -89,32 +170,118 @@ async def refresh(
     async def _():
         async with r.lock(Key.refresh_lock.format(sync_id=pk), blocking=False):
             sync = await Sync.get(pk=pk).select_related("source", "meilisearch")
-            source_obj = sync.source.get_source()
-            Scheduler.remove_source(sync.source.pk)
-            progress = Runner.get_progress(sync.source.pk)
-            await progress.set(**await source_obj.get_current_progress())
-            index_exists = await sync.meili_client.index_exists(sync.index)
-            if not index_exists:
-                await sync.create_index()
-            count = await sync.meili_client.refresh_data(
-                sync.sync_config,
-                source_obj.get_full_data(
-                    sync.sync_config, sync.meilisearch.insert_size or 10000
-                ),
-            )
-            logger.success(f"Refreshed {count} records!")
-            await Scheduler.restart_source(
-                sync.source,
-            )
+            async with Scheduler.pause_source(sync.source):
+                # the spooled events are older than the refreshed data
+                await Spool.reset(sync.source.pk)
+                async with sync.source.acquire_source() as source_obj:
+                    full_sync = FullSync(
+                        sync.source.pk,
+                        sync.pk,
+                        sync.meili_client,
+                        sync.sync_config,
+                        source_obj,
+                        sync.meilisearch.insert_size or 10000,
+                    )
+                    current_progress = (
+                        await full_sync.get_refresh_progress()
+                        or await source_obj.get_current_progress()
+                    )
+                    progress = Runner.get_progress(sync.source.pk)
+                    await progress.set(**current_progress)
+                    index_exists = await sync.meili_client.index_exists(sync.index)
+                    if not index_exists:
+                        await sync.create_index()
+                    count = await full_sync.refresh(current_progress)
+                    logger.success(f"Refreshed {count} records!")
 
     background_tasks.add_task(_)
 
 
+@router.get(
+    "/{pk}/full_sync",
+    summary="获取全量同步进度",
+    description="包括已同步数量、总数、速度和预计剩余时间，中断后会从记录的主键继续同步",
+)
+async def get_full_sync(pk: int):
+    sync = await Sync.get(pk=pk)
+    return await FullSync.get_state(sync.source_id, sync.pk)  # type: ignore
+
+
+@router.get(
+    "/{pk}/metrics",
+    summary="获取同步实时指标",
+    description="最近一个统计窗口内的事件速率、从读取事件到Meilisearch接收的延迟分位数、"
+    "队列深度、待写入事件数、同一文档事件的合并率和当前使用的批量大小与间隔，随调度节点心跳更新",
+)
+async def get_metrics(pk: int):
+    sync = await Sync.get(pk=pk)
+    status = await Scheduler.get_status(sync.source_id)  # type: ignore
+    sync_status = status.get("syncs", {}).get(str(sync.pk))
+    if not sync_status:
+        return {"running": False}
+    return {
+        "running": status["running"],
+        "node": status["node"],
+        "queue": sync_status["queue"],
+        **sync_status["metrics"],
+    }
+
+
+@router.get(
+    "/{pk}/stream",
+    summary="订阅同步实时状态",
+    description="Server-Sent Events，推送运行状态、实时指标、同步位置和数量中变化的部分，"
+    "数量由服务端定时刷新并由所有订阅者共享",
+)
+async def stream(pk: int, request: Request):
+    sync = await Sync.get(pk=pk).select_related("source", "meilisearch")
+    progress = Runner.get_progress(sync.source.pk)
+
+    async def _():
+        last: dict = {}
+        while not await request.is_disconnected():
+            status = await Scheduler.get_status(sync.source.pk)
+            sync_status = status.get("syncs", {}).get(str(sync.pk), {})
+            state = {
+                "running": status["running"],
+                "state": status.get("state"),
+                "last_error": status.get("last_error"),
+                "metrics": sync_status.get("metrics"),
+                "queue": sync_status.get("queue"),
+                "progress": await progress.get(),
+                "counts": await SyncCount.get(sync),
+            }
+            # only the changed parts are sent, the first message has everything
+            delta = {
+                key: value
+                for key, value in state.items()
+                if key not in last or last[key] != value
+            }
+            if delta:
+                yield f"event: status\ndata: {json.dumps(delta, default=str)}\n\n"
+            else:
+                yield ": ping\n\n"
+            last = state
+            await asyncio.sleep(settings.SSE_INTERVAL)
+
+    return StreamingResponse(
+        _(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/{pks}", status_code=HTTP_204_NO_CONTENT, summary="删除同步")
 async def delete(pks: str):
-    for pk in pks.split(","):
-        sync = await Sync.get(pk=pk)
-        await sync.delete()
+    qs = Sync.filter(pk__in=pks.split(","))
+    rows = await qs.distinct().values("source_id")
+    source_ids = sorted(row["source_id"] for row in rows)
+    async with in_transaction():
+        deleted = await qs.delete()
+    # a filtered delete sends no signals, so the sources are reloaded once here
+    await Counter.incr("sync", -deleted)
+    await Counter.reset("sync_log")
+    await Scheduler.reload_sources(source_ids)
 
 
 @router.put(
@@ -138,13 +305,13 @@ async def update(
 @router.get(
     "/logs",
     summary="获取同步日志",
-    description="每分钟记录一次，包括同步数量和类型",
+    description="每分钟记录一次，包括同步数量和类型，使用`next_cursor`翻页",
 )
 async def logs(
     sync_id: int | None = None,
     source_id: int | None = None,
     meilisearch_id: int | None = None,
-    query: Query = Depends(Query),
+    query: CursorQuery = Depends(CursorQuery),
     type: EventType | None = None,
 ):
     qs = SyncLog.all()
@@ -156,21 +323,29 @@ async def logs(
         qs = qs.filter(sync__meilisearch_id=meilisearch_id)
     if type:
         qs = qs.filter(type=type)
-    total = await qs.count()
-    data = await qs.limit(query.limit).offset(query.offset).order_by(*query.orders)
-    return dict(total=total, data=data)
+    return await paginate(
+        qs, query, filtered=bool(sync_id or source_id or meilisearch_id or type)
+    )
 
 
 @router.delete("/logs/{pks}", status_code=HTTP_204_NO_CONTENT, summary="删除同步记录")
 async def delete_sync_logs(pks: str):
-    await SyncLog.filter(pk__in=pks.split(",")).delete()
+    deleted = await SyncLog.filter(pk__in=pks.split(",")).delete()
+    await Counter.incr("sync_log", -deleted)
 
 
-@router.get("/{pk}/progress", summary="获取同步进度")
-async def get_progress(pk: int):
+@router.get(
+    "/{pk}/progress",
+    summary="获取同步进度",
+    description="计数会缓存一段时间，并发请求共享同一次计数；approximate为true时使用表统计信息估算源数据量，"
+    "避免在大表上执行全表计数",
+)
+async def get_progress(pk: int, approximate: bool = False):
     sync = await Sync.get(pk=pk).select_related("source", "meilisearch")
-    await sync.get_count()
+    counts = await SyncCount.get(sync, approximate, wait=True)
     return {
-        "source_count": sync.source_count,
-        "meilisearch_count": sync.meilisearch_count,
+        "source_count": counts["source_count"],  # type: ignore
+        "meilisearch_count": counts["meilisearch_count"],  # type: ignore
+        "approximate": approximate,
+        "counted_at": counts["counted_at"],  # type: ignore
     }
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from aerich import Command
@@ -8,17 +9,22 @@ from starlette.middleware.sessions import SessionMiddleware
 from tortoise.contrib.fastapi import register_tortoise
 from tortoise.exceptions import DoesNotExist
 
-from meilisync_admin.api import router
+from meilisync_admin import signals  # noqa: F401
+from meilisync_admin.api import metrics, router
 from meilisync_admin.exceptions import (
     custom_http_exception_handler,
     exception_handler,
     not_exists_exception_handler,
     validation_exception_handler,
 )
+from meilisync_admin.libs.meili import MeiliClients
+from meilisync_admin.libs.source_pool import SourcePool
 from meilisync_admin.log import init_logging
+from meilisync_admin.rollup import start_rollup
 from meilisync_admin.scheduler import Scheduler
 from meilisync_admin.settings import TORTOISE_ORM, settings
 from meilisync_admin.static import SPAStaticFiles
+from meilisync_admin.worker import Supervisor
 
 
 @asynccontextmanager
@@ -27,9 +33,24 @@ async def lifespan(_: FastAPI):
     aerich = Command(TORTOISE_ORM)
     await aerich.init()
     await aerich.upgrade(True)
-    await Scheduler.startup()
+    if settings.SCHEDULER_PROCESSES:
+        scheduler_task = asyncio.create_task(
+            Supervisor.run(settings.SCHEDULER_PROCESSES)
+        )
+    else:
+        scheduler_task = asyncio.create_task(Scheduler.run())
+    rollup_task = asyncio.create_task(start_rollup())
+    source_pool_task = asyncio.create_task(SourcePool.run())
     yield
-    Scheduler.shutdown()
+    source_pool_task.cancel()
+    rollup_task.cancel()
+    scheduler_task.cancel()
+    if settings.SCHEDULER_PROCESSES:
+        await Supervisor.shutdown()
+    else:
+        await Scheduler.shutdown()
+    await MeiliClients.close()
+    await SourcePool.close()
 
 
 if settings.DEBUG:
@@ -56,6 +77,7 @@ else:
         lifespan=lifespan,
     )
 app.include_router(router, prefix="/api")
+app.include_router(metrics.router)
 register_tortoise(
     app,
     config=TORTOISE_ORM,
@@ -0,0 +1,55 @@
+from typing import Optional
+
+
+class AdaptiveBatch:
+    def __init__(
+        self,
+        size: int,
+        interval: float,
+        target_lag: float,
+        min_size: int,
+        max_size: int,
+        max_interval: float,
+        backlog_threshold: int,
+    ):
+        self.target_lag = target_lag
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_interval = min(0.1, target_lag / 2)
+        self.max_interval = min(max_interval, target_lag / 2)
+        self.backlog_threshold = backlog_threshold
+        self.size = max(min_size, min(size, max_size))
+        self.interval = max(self.min_interval, min(interval, self.max_interval))
+        self.last_flush_seconds: Optional[float] = None
+        self.last_lag: Optional[float] = None
+        self.last_backlog: Optional[int] = None
+
+    def _resize(self, size_factor: float, interval_factor: float):
+        self.size = max(self.min_size, min(int(self.size * size_factor), self.max_size))
+        self.interval = max(
+            self.min_interval, min(self.interval * interval_factor, self.max_interval)
+        )
+
+    def observe(self, count: int, flush_seconds: float, lag: float, backlog: int):
+        self.last_flush_seconds = round(flush_seconds, 4)
+        self.last_lag = round(lag, 4)
+        self.last_backlog = backlog
+        if backlog >= self.backlog_threshold:
+            # meilisearch is behind on indexing, fewer and larger tasks help it most
+            self._resize(2, 2)
+        elif lag > self.target_lag:
+            # events wait too long in the buffer, a slow insert also needs smaller batches
+            self._resize(0.5 if flush_seconds > self.target_lag / 2 else 1, 0.5)
+        elif lag < self.target_lag / 2:
+            # only a batch flushed for being full is worth growing
+            self._resize(1.25 if count >= self.size else 1, 1.25)
+
+    def status(self):
+        return {
+            "batch_size": self.size,
+            "batch_interval": round(self.interval, 4),
+            "batch_target_lag": self.target_lag,
+            "batch_flush_seconds": self.last_flush_seconds,
+            "batch_lag_seconds": self.last_lag,
+            "batch_task_backlog": self.last_backlog,
+        }
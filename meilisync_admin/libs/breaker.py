@@ -0,0 +1,65 @@
+import random
+import time
+from enum import Enum
+from typing import Optional
+
+
+class BreakerState(str, Enum):
+    running = "running"
+    backing_off = "backing_off"
+    open = "open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        threshold: int,
+        timeout: float,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self.threshold = threshold
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.state = BreakerState.running
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        # set when a run started, a failed startup is no run
+        self.started_at: Optional[float] = time.time()
+        self.next_retry_at: Optional[float] = None
+
+    def success(self):
+        self.state = BreakerState.running
+        self.started_at = time.time()
+        self.next_retry_at = None
+
+    def failure(self, error: Exception) -> float:
+        # a run which stayed up longer than the longest backoff was healthy,
+        # it resets the count once, not on every failed startup after it
+        if (
+            self.started_at is not None
+            and time.time() - self.started_at >= self.backoff_max
+        ):
+            self.failures = 0
+        self.started_at = None
+        self.failures += 1
+        self.last_error = repr(error)
+        if self.failures >= self.threshold:
+            self.state = BreakerState.open
+            delay = self.timeout
+        else:
+            self.state = BreakerState.backing_off
+            delay = min(self.backoff_base * 2 ** (self.failures - 1), self.backoff_max)
+        # jitter so that sources sharing a dead server don't retry in lockstep
+        delay = random.uniform(delay / 2, delay)
+        self.next_retry_at = time.time() + delay
+        return delay
+
+    def status(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "next_retry_at": self.next_retry_at,
+        }
@@ -0,0 +1,45 @@
+import asyncio
+import time
+from typing import Optional
+
+from meilisync.progress import Progress
+
+
+class Checkpointer:
+    def __init__(self, progress: Progress, interval: float, max_events: int):
+        self.progress = progress
+        self.interval = interval
+        self.max_events = max_events
+        self.pending: Optional[dict] = None
+        self.pending_events = 0
+        self.last_flush_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def mark(self, progress: dict, events: int = 1):
+        self.pending = progress
+        self.pending_events += events
+        if (
+            self.pending_events >= self.max_events
+            or time.monotonic() - self.last_flush_at >= self.interval
+        ):
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if self.pending is None:
+                return
+            progress, self.pending = self.pending, None
+            events, self.pending_events = self.pending_events, 0
+            self.last_flush_at = time.monotonic()
+            try:
+                await self.progress.set(**progress)
+            except BaseException:
+                if self.pending is None:
+                    self.pending = progress
+                self.pending_events += events
+                raise
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
@@ -0,0 +1,32 @@
+from typing import Awaitable, Callable
+
+from meilisync_admin.libs.redis import Key, r
+from meilisync_admin.settings import settings
+
+# only adjust counters which are already loaded, a missing one is recounted
+INCR_SCRIPT = r.register_script("""
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("INCRBY", KEYS[1], ARGV[1])
+end
+""")
+
+
+class Counter:
+    @classmethod
+    async def get(cls, name: str, count: Callable[[], Awaitable[int]]) -> int:
+        key = Key.counter.format(name=name)
+        cached = await r.get(key)
+        if cached is not None:
+            return int(cached)
+        value = await count()
+        # expire so the counter heals if a change was missed
+        await r.set(key, value, ex=settings.COUNTER_EXPIRE, nx=True)
+        return value
+
+    @classmethod
+    async def incr(cls, name: str, amount: int = 1):
+        await INCR_SCRIPT(keys=[Key.counter.format(name=name)], args=[amount])
+
+    @classmethod
+    async def reset(cls, *names: str):
+        await r.delete(*[Key.counter.format(name=name) for name in names])
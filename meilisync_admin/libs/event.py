@@ -0,0 +1,132 @@
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from meilisync.enums import EventType
+from meilisync.event import EventCollection
+from meilisync.schemas import Event, ProgressEvent
+from meilisync.settings import Sync as SyncSettings
+from pydantic import PrivateAttr
+
+
+class SharedEvent(Event):
+    # one instance is handed to every sync of the table, so each distinct
+    # field set is projected and encoded only once
+    _documents: dict = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def share(cls, event: Event):
+        return cls.model_construct(**dict(event))
+
+    def encode(self, fields: Optional[dict], json_handler: Any) -> bytes:
+        key = (
+            type(json_handler),
+            None if fields is None else tuple(fields.items()),
+        )
+        document = self._documents.get(key)
+        if document is None:
+            document = json_handler.dump_bytes(self.mapping_data(fields))
+            self._documents[key] = document
+        return document
+
+
+def encode_document(event: Event, fields: Optional[dict], json_handler: Any) -> bytes:
+    # the client's json handler, so the documents are encoded like add_documents does
+    if isinstance(event, SharedEvent):
+        return event.encode(fields, json_handler)
+    return json_handler.dump_bytes(event.mapping_data(fields))
+
+
+# values json has no type for are tagged, so they are read back as they were read
+TYPE_TAG = "__spool_type__"
+DECODERS: Dict[str, Callable[[Any], Any]] = {
+    "decimal": decimal.Decimal,
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "timedelta": lambda value: datetime.timedelta(seconds=value),
+    "uuid": uuid.UUID,
+    "bytes": base64.b64decode,
+    "set": set,
+}
+
+
+def _encode_value(value):
+    if isinstance(value, decimal.Decimal):
+        return {TYPE_TAG: "decimal", "value": str(value)}
+    # datetime before date, it is a subclass
+    if isinstance(value, datetime.datetime):
+        return {TYPE_TAG: "datetime", "value": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {TYPE_TAG: "date", "value": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {TYPE_TAG: "time", "value": value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {TYPE_TAG: "timedelta", "value": value.total_seconds()}
+    if isinstance(value, uuid.UUID):
+        return {TYPE_TAG: "uuid", "value": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {TYPE_TAG: "bytes", "value": base64.b64encode(value).decode()}
+    if isinstance(value, (set, frozenset)):
+        return {TYPE_TAG: "set", "value": list(value)}
+    # e.g. a nested bson ObjectId, kept as its string form
+    return str(value)
+
+
+def _decode_value(obj: dict):
+    if TYPE_TAG in obj:
+        return DECODERS[obj[TYPE_TAG]](obj["value"])
+    return obj
+
+
+def encode_event(event: ProgressEvent) -> bytes:
+    return json.dumps(event.model_dump(), default=_encode_value).encode()
+
+
+def decode_event(raw: bytes) -> ProgressEvent:
+    obj = json.loads(raw, object_hook=_decode_value)
+    if "type" in obj:
+        return Event(**obj)
+    return ProgressEvent(**obj)
+
+
+def coalesce(previous: Event, event: Event) -> Event:
+    if event.type == EventType.delete:
+        # a create before the delete may have been written already before a
+        # restart replayed it, so the delete is always kept
+        return event
+    if previous.type == EventType.delete or event.type == EventType.create:
+        return event
+    # mongo updates only carry the changed fields, so the chain is merged
+    return Event(
+        type=previous.type,
+        table=event.table,
+        data={**previous.data, **event.data},
+        progress=event.progress,
+    )
+
+
+class CoalescingEventCollection(EventCollection):
+    def __init__(self):
+        super().__init__()
+        self.added = 0
+        self.coalesced = 0
+
+    def add_event(self, sync: SyncSettings, event: Event):
+        pk = event.data[sync.pk]
+        events = self._events.setdefault(sync, {})
+        previous = events.get(pk)
+        self.added += 1
+        if previous is not None:
+            self.coalesced += 1
+            event = coalesce(previous, event)
+        events[pk] = event
+
+    @property
+    def dedup_ratio(self):
+        if not self.added:
+            return 0
+        return round(self.coalesced / self.added, 4)
@@ -0,0 +1,169 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from meilisync.meili import Meili
+from meilisync.settings import Sync as SyncSettings
+from meilisync.source import Source as SourceObj
+
+from meilisync_admin.libs.redis import Key, r, to_str
+from meilisync_admin.libs.source import get_count, get_full_data
+
+
+class FullSync:
+    done_expire = 24 * 60 * 60
+
+    def __init__(
+        self,
+        source_id: int,
+        sync_id: int,
+        meili: Meili,
+        sync: SyncSettings,
+        source_obj: SourceObj,
+        size: int,
+    ):
+        self.key = Key.full_sync.format(source_id=source_id, sync_id=sync_id)
+        self.meili = meili
+        self.sync = sync
+        self.source_obj = source_obj
+        self.size = size
+
+    @staticmethod
+    async def _get_state(key: str) -> Dict[str, Any]:
+        state = await r.hgetall(key)
+        return {to_str(k): json.loads(v) for k, v in state.items()}
+
+    @classmethod
+    async def get_state(cls, source_id: int, sync_id: int):
+        return await cls._get_state(
+            Key.full_sync.format(source_id=source_id, sync_id=sync_id)
+        )
+
+    @staticmethod
+    def _is_running(state: Dict[str, Any], mode: str):
+        # an interrupted refresh is resumed by the next one
+        return (
+            state.get("status") in ("running", "interrupted")
+            and state.get("mode") == mode
+        )
+
+    @classmethod
+    async def is_pending(cls, source_id: int, sync_id: int, mode: str):
+        return cls._is_running(await cls.get_state(source_id, sync_id), mode)
+
+    @classmethod
+    async def interrupt(cls, source_id: int, sync_ids: List[int]):
+        for sync_id in sync_ids:
+            key = Key.full_sync.format(source_id=source_id, sync_id=sync_id)
+            state = await cls._get_state(key)
+            if state.get("status") == "running" and state.get("mode") == "refresh":
+                logger.warning(f"Refresh of sync {sync_id} was interrupted")
+                await r.hset(key, "status", json.dumps("interrupted"))
+
+    async def _save_state(self, **kwargs):
+        await r.hset(
+            self.key,
+            mapping={k: json.dumps(v, default=str) for k, v in kwargs.items()},
+        )
+
+    async def get_refresh_progress(self) -> Optional[dict]:
+        # a resumed refresh replays the source from where the first attempt began
+        state = await self._get_state(self.key)
+        if self._is_running(state, "refresh"):
+            return state.get("progress")
+        return None
+
+    async def start(
+        self, mode: str, progress: Optional[dict] = None, restart: bool = False
+    ) -> Dict[str, Any]:
+        # saved before the index is created, so a crash in between still
+        # leaves the load pending
+        state = await self._get_state(self.key)
+        if not restart and self._is_running(state, mode):
+            return state
+        try:
+            # only used for the eta, table statistics are good enough
+            total = await get_count(self.source_obj, self.sync, approximate=True)
+        except Exception as e:
+            logger.warning(f'Failed to count table "{self.sync.table}": {e}')
+            total = None
+        state = dict(
+            status="running",
+            mode=mode,
+            cursor=None,
+            count=0,
+            total=total,
+            progress=progress,
+            started_at=time.time(),
+        )
+        await r.delete(self.key)
+        await self._save_state(**state)
+        return state
+
+    async def load(self, index: str, mode: str, progress: Optional[dict] = None):
+        state = await self.start(mode, progress)
+        cursor = state.get("cursor")
+        count = state.get("count", 0)
+        total = state.get("total")
+        if count:
+            logger.info(
+                f'Resume full data sync for index "{index}" from cursor {cursor}, '
+                f"{count} documents already added."
+            )
+        sync = self.sync.model_copy(update={"index": index})
+        started_at = time.time()
+        loaded = 0
+        task = None
+        async for rows, cursor in get_full_data(
+            self.source_obj, sync, self.size, cursor
+        ):
+            task = await self.meili.add_data(sync, rows)
+            count += len(rows)
+            loaded += len(rows)
+            speed = loaded / max(time.time() - started_at, 0.001)
+            eta = None
+            if total:
+                eta = max(total - count, 0) / speed
+            await self._save_state(
+                cursor=cursor,
+                count=count,
+                speed=round(speed, 2),
+                eta=round(eta) if eta is not None else None,
+                updated_at=time.time(),
+            )
+        await self._save_state(
+            status="done", cursor=None, eta=0, updated_at=time.time()
+        )
+        await r.expire(self.key, self.done_expire)
+        return count, task
+
+    async def refresh(self, progress: dict):
+        client = self.meili.client
+        index = self.sync.index_name
+        index_tmp = f"{index}_tmp"
+        state = await self._get_state(self.key)
+        resume = self._is_running(state, "refresh") and await self.meili.index_exists(
+            index_tmp
+        )
+        if not resume:
+            await self.start("refresh", progress, restart=True)
+            if await self.meili.index_exists(index_tmp):
+                await client.index(index_tmp).delete()
+            settings = await client.index(index).get_settings()
+            tmp = await client.create_index(index_tmp, primary_key=self.sync.pk)
+            task = await tmp.update_settings(settings)
+            logger.info(
+                f"Waiting for update tmp index {index_tmp} settings to complete..."
+            )
+            await client.wait_for_task(task.task_uid, timeout_in_ms=None)
+        count, task = await self.load(index_tmp, "refresh", progress)
+        if task:
+            logger.info(f"Waiting for insert tmp index {index_tmp} to complete...")
+            await client.wait_for_task(task.task_uid, timeout_in_ms=None)
+        task = await client.swap_indexes([(index, index_tmp)])
+        logger.info(f"Waiting for swap index {index} to complete...")
+        await client.wait_for_task(task.task_uid, timeout_in_ms=None)
+        await client.index(index_tmp).delete()
+        logger.success(f"Swap index {index} complete")
+        return count
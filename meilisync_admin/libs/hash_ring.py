@@ -0,0 +1,23 @@
+import bisect
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        # virtual nodes spread the sources evenly, and only the sources of a
+        # joining or leaving node change owner
+        self.ring: List[Tuple[int, str]] = sorted(
+            (self._hash(f"{node}:{i}"), node) for node in nodes for i in range(replicas)
+        )
+        self.keys = [key for key, _ in self.ring]
+
+    @staticmethod
+    def _hash(key: str):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.ring:
+            return None
+        index = bisect.bisect(self.keys, self._hash(key)) % len(self.keys)
+        return self.ring[index][1]
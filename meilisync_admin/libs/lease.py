@@ -0,0 +1,94 @@
+import uuid
+from typing import Optional
+
+from meilisync.progress import Progress
+
+from meilisync_admin.libs.redis import Key, r
+
+# the fence is bumped on every new acquire, so a stale holder can be told apart
+ACQUIRE_SCRIPT = r.register_script("""
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return redis.call("INCR", KEYS[2])
+end
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    redis.call("PEXPIRE", KEYS[1], ARGV[2])
+    return tonumber(redis.call("GET", KEYS[2]))
+end
+return 0
+""")
+RENEW_SCRIPT = r.register_script("""
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+""")
+RELEASE_SCRIPT = r.register_script("""
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+""")
+FENCED_HSET_SCRIPT = r.register_script("""
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("HSET", KEYS[2], unpack(ARGV, 2))
+return 1
+""")
+
+
+class LeaseLost(Exception):
+    pass
+
+
+class Lease:
+    def __init__(self, name: str, ttl: float, token: Optional[str] = None):
+        self.key = Key.lease.format(name=name)
+        self.fence_key = Key.lease_fence.format(name=name)
+        self.ttl = ttl
+        self.token = token or uuid.uuid4().hex
+        self.fence: Optional[int] = None
+
+    async def acquire(self) -> bool:
+        fence = await ACQUIRE_SCRIPT(
+            keys=[self.key, self.fence_key],
+            args=[self.token, int(self.ttl * 1000)],
+        )
+        self.fence = int(fence) or None
+        return self.fence is not None
+
+    async def renew(self) -> bool:
+        if self.fence is None:
+            return False
+        if not await RENEW_SCRIPT(
+            keys=[self.key], args=[self.token, int(self.ttl * 1000)]
+        ):
+            self.fence = None
+        return self.fence is not None
+
+    async def release(self):
+        if self.fence is None:
+            return
+        self.fence = None
+        await RELEASE_SCRIPT(keys=[self.key], args=[self.token])
+
+
+class FencedProgress(Progress):
+    def __init__(self, progress: Progress, lease: Lease):
+        super().__init__(**progress.kwargs)
+        self.type = progress.type
+        self.progress = progress
+        self.lease = lease
+
+    async def get(self):
+        return await self.progress.get()
+
+    async def set(self, **kwargs):
+        # rejected once another process has acquired the lease after us
+        args = [self.lease.fence or 0]
+        for k, v in kwargs.items():
+            args += [k, v]
+        if not await FENCED_HSET_SCRIPT(
+            keys=[self.lease.fence_key, self.progress.kwargs["key"]], args=args
+        ):
+            raise LeaseLost(f"Lease {self.lease.key} is lost")
@@ -0,0 +1,43 @@
+import importlib.util
+import inspect
+from typing import Dict, Optional, Tuple
+
+from meilisearch_python_sdk import AsyncClient
+from meilisync.meili import Meili
+
+HTTP2_SUPPORTED = (
+    "http2" in inspect.signature(AsyncClient).parameters
+    and importlib.util.find_spec("h2") is not None
+)
+
+
+class MeiliClients:
+    _clients: Dict[Tuple[int, str, Optional[str]], Meili] = {}
+    # the clients built by the Meili constructor before HTTP/2 ones replaced them
+    _replaced: Dict[Tuple[int, str, Optional[str]], AsyncClient] = {}
+
+    @classmethod
+    def get(cls, pk: int, api_url: str, api_key: Optional[str] = None) -> Meili:
+        key = (pk, api_url, api_key)
+        meili = cls._clients.get(key)
+        if not meili:
+            meili = Meili(api_url, api_key)
+            if HTTP2_SUPPORTED:
+                cls._replaced[key] = meili.client
+                meili.client = AsyncClient(api_url, api_key, http2=True)
+            cls._clients[key] = meili
+        return meili
+
+    @classmethod
+    async def invalidate(cls, pk: int):
+        for key in [key for key in cls._clients if key[0] == pk]:
+            meili = cls._clients.pop(key)
+            await meili.client.aclose()
+            replaced = cls._replaced.pop(key, None)
+            if replaced:
+                await replaced.aclose()
+
+    @classmethod
+    async def close(cls):
+        for pk in {key[0] for key in cls._clients}:
+            await cls.invalidate(pk)
@@ -0,0 +1,49 @@
+import time
+from collections import deque
+from typing import Deque, List, Tuple
+
+
+class RollingCounter:
+    def __init__(self, window: int):
+        self.window = window
+        self.buckets: Deque[List[int]] = deque()
+
+    def _trim(self, second: int):
+        while self.buckets and self.buckets[0][0] <= second - self.window:
+            self.buckets.popleft()
+
+    def add(self, count: int = 1):
+        # one bucket per second, so a busy table costs no more memory
+        second = int(time.monotonic())
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += count
+        else:
+            self.buckets.append([second, count])
+        self._trim(second)
+
+    def rate(self):
+        self._trim(int(time.monotonic()))
+        return sum(count for _, count in self.buckets) / self.window
+
+
+class RollingSamples:
+    def __init__(self, window: int, max_samples: int = 10000):
+        self.window = window
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, value: float):
+        self.samples.append((time.monotonic(), value))
+
+    def percentiles(self, *percents: int):
+        now = time.monotonic()
+        while self.samples and self.samples[0][0] <= now - self.window:
+            self.samples.popleft()
+        values = sorted(value for _, value in self.samples)
+        if not values:
+            return {f"p{percent}": None for percent in percents}
+        return {
+            f"p{percent}": round(
+                values[min(len(values) - 1, len(values) * percent // 100)], 4
+            )
+            for percent in percents
+        }
@@ -0,0 +1,37 @@
+from typing import Type
+
+from tortoise import Model
+from tortoise.queryset import QuerySet
+
+from meilisync_admin.schema.request import CursorQuery, Order
+
+
+async def estimate_count(model: Type[Model]) -> int:
+    rows = await model._meta.db.execute_query_dict(
+        "SELECT TABLE_ROWS AS count FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        [model._meta.db_table],
+    )
+    return rows[0]["count"] if rows else 0
+
+
+async def paginate(qs: QuerySet, query: CursorQuery, filtered: bool):
+    page = qs
+    if query.order == Order.desc:
+        if query.cursor:
+            page = page.filter(id__lt=query.cursor)
+        page = page.order_by("-id")
+    else:
+        if query.cursor:
+            page = page.filter(id__gt=query.cursor)
+        page = page.order_by("id")
+    data = await page.limit(query.limit + 1)
+    next_cursor = None
+    if len(data) > query.limit:
+        data = data[: query.limit]
+        next_cursor = data[-1].pk
+    total = None
+    if query.estimate_total:
+        # table statistics are only usable when the whole table is listed
+        total = await qs.count() if filtered else await estimate_count(qs.model)
+    return {"total": total, "data": data, "next_cursor": next_cursor}
@@ -0,0 +1,63 @@
+import asyncio
+import sys
+from collections import deque
+from typing import Any, Deque, Tuple
+
+from meilisync.schemas import Event, ProgressEvent
+
+
+def get_event_size(event: ProgressEvent):
+    size = sys.getsizeof(event.progress)
+    if isinstance(event, Event):
+        size += sys.getsizeof(event.data)
+        for key, value in event.data.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class EventQueue:
+    def __init__(self, max_size: int, max_bytes: int):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.max_depth_seen = 0
+        self.max_bytes_seen = 0
+        self._items: Deque[Tuple[Any, int]] = deque()
+        self._condition = asyncio.Condition()
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    def _has_room(self, size: int):
+        # always accept one item, so an event larger than max_bytes can't stall
+        if not self._items:
+            return True
+        return self.depth < self.max_size and self.bytes + size <= self.max_bytes
+
+    async def put(self, item: Any, size: int):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._has_room(size))
+            self._items.append((item, size))
+            self.bytes += size
+            self.max_depth_seen = max(self.max_depth_seen, self.depth)
+            self.max_bytes_seen = max(self.max_bytes_seen, self.bytes)
+            self._condition.notify_all()
+
+    async def get(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.depth > 0)
+            item, size = self._items.popleft()
+            self.bytes -= size
+            self._condition.notify_all()
+            return item, size
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "bytes": self.bytes,
+            "max_depth": self.max_depth_seen,
+            "max_bytes": self.max_bytes_seen,
+            "limit_depth": self.max_size,
+            "limit_bytes": self.max_bytes,
+        }
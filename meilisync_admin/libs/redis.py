@@ -5,5 +5,25 @@ from meilisync_admin.settings import settings
 r = redis.from_url(settings.REDIS_URL)
 
 
+def to_str(value: bytes | str) -> str:
+    # the client returns bytes, the stubs also allow str for decode_responses
+    return value.decode() if isinstance(value, bytes) else value
+
+
 class Key:
     refresh_lock = "meilisync:refresh_lock:{sync_id}"
+    full_sync = "meilisync:progress:{source_id}:full_sync:{sync_id}"
+    sync_log_rollup = "meilisync:sync_log_rollup"
+    sync_log_rollup_lock = "meilisync:sync_log_rollup_lock"
+    counter = "meilisync:counter:{name}"
+    stat = "meilisync:stat:{start_date}:{end_date}"
+    lease = "meilisync:lease:{name}"
+    lease_fence = "meilisync:lease:{name}:fence"
+    scheduler_channel = "meilisync:scheduler"
+    scheduler_nodes = "meilisync:scheduler:nodes"
+    scheduler_node = "meilisync:scheduler:node:{node_id}"
+    scheduler_pause = "meilisync:scheduler:pause:{source_id}"
+    sync_count = "meilisync:sync_count:{sync_id}:{mode}"
+    sync_count_lock = "meilisync:sync_count_lock:{sync_id}:{mode}"
+    spool = "meilisync:spool:{source_id}"
+    spool_cursor = "meilisync:spool:{source_id}:cursor"
@@ -0,0 +1,174 @@
+import asyncio
+from typing import Any, AsyncGenerator, List, Optional, Tuple
+
+from meilisync.enums import SourceType
+from meilisync.settings import Sync as SyncSettings
+from meilisync.source import Source as SourceObj
+
+from meilisync_admin.libs.source_pool import SourcePool
+
+
+def get_cursor_field(sync: SyncSettings):
+    if sync.fields is None:
+        return sync.pk
+    if sync.pk in sync.fields:
+        return sync.fields[sync.pk] or sync.pk
+    return None
+
+
+def _get_sql_fields(sync: SyncSettings):
+    if sync.fields:
+        return ", ".join(
+            f"{field} as {sync.fields[field] or field}" for field in sync.fields
+        )
+    return "*"
+
+
+async def _get_mysql_data(
+    source_obj: SourceObj, sync: SyncSettings, size: int, cursor: Any
+):
+    from asyncmy.cursors import DictCursor
+
+    sql = f"SELECT {_get_sql_fields(sync)} FROM {sync.table}"
+    async with SourcePool.mysql_connection(source_obj) as conn:
+        async with conn.cursor(cursor=DictCursor) as cur:
+            while True:
+                if cursor is None:
+                    await cur.execute(f"{sql} ORDER BY {sync.pk} LIMIT {size}")
+                else:
+                    await cur.execute(
+                        f"{sql} WHERE {sync.pk} > %s ORDER BY {sync.pk} LIMIT {size}",
+                        (cursor,),
+                    )
+                rows = await cur.fetchall()
+                if not rows:
+                    break
+                cursor = rows[-1][get_cursor_field(sync)]
+                yield rows, cursor
+
+
+async def _get_postgres_data(
+    source_obj: SourceObj, sync: SyncSettings, size: int, cursor: Any
+):
+    sql = f"SELECT {_get_sql_fields(sync)} FROM {sync.table}"
+
+    def _(cursor: Any):
+        with source_obj.conn_dict.cursor() as cur:  # type: ignore
+            if cursor is None:
+                cur.execute(f"{sql} ORDER BY {sync.pk} LIMIT {size}")
+            else:
+                cur.execute(
+                    f"{sql} WHERE {sync.pk} > %s ORDER BY {sync.pk} LIMIT {size}",
+                    (cursor,),
+                )
+            return cur.fetchall()
+
+    while True:
+        rows = await asyncio.get_event_loop().run_in_executor(None, _, cursor)
+        if not rows:
+            break
+        cursor = rows[-1][get_cursor_field(sync)]
+        yield rows, cursor
+
+
+async def _get_mongo_data(
+    source_obj: SourceObj, sync: SyncSettings, size: int, cursor: Any
+):
+    from bson import ObjectId
+
+    collection = source_obj.db[sync.table]  # type: ignore
+    fields = dict(sync.fields) if sync.fields else {}
+    while True:
+        query = {}
+        if cursor is not None:
+            query = {sync.pk: {"$gt": ObjectId(cursor) if sync.pk == "_id" else cursor}}
+        rows = (
+            await collection.find(query, fields or None)
+            .sort(sync.pk)
+            .limit(size)
+            .to_list(size)
+        )
+        if not rows:
+            break
+        for row in rows:
+            row["_id"] = str(row["_id"])
+        cursor = rows[-1][get_cursor_field(sync)]
+        yield rows, cursor
+
+
+async def get_full_data(
+    source_obj: SourceObj, sync: SyncSettings, size: int, cursor: Any = None
+) -> AsyncGenerator[Tuple[List[dict], Optional[Any]], None]:
+    if get_cursor_field(sync) is None:
+        # the primary key is not selected, so the load can't be resumed
+        async for rows in source_obj.get_full_data(sync, size):
+            yield rows, None
+        return
+    if source_obj.type == SourceType.mysql:
+        data = _get_mysql_data(source_obj, sync, size, cursor)
+    elif source_obj.type == SourceType.postgres:
+        data = _get_postgres_data(source_obj, sync, size, cursor)
+    else:
+        data = _get_mongo_data(source_obj, sync, size, cursor)
+    async for rows, cursor in data:
+        yield rows, cursor
+
+
+async def _get_mysql_count(source_obj: SourceObj, sync: SyncSettings):
+    async with SourcePool.mysql_connection(source_obj) as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(f"SELECT COUNT(*) FROM {sync.table}")
+            ret = await cur.fetchone()
+    return ret[0]
+
+
+async def _get_mysql_approximate_count(source_obj: SourceObj, sync: SyncSettings):
+    async with SourcePool.mysql_connection(source_obj) as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+                (source_obj.database, sync.table),  # type: ignore
+            )
+            ret = await cur.fetchone()
+    return ret[0] if ret else None
+
+
+async def _get_postgres_approximate_count(source_obj: SourceObj, sync: SyncSettings):
+    def _():
+        with source_obj.conn_dict.cursor() as cur:  # type: ignore
+            cur.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                (sync.table,),
+            )
+            ret = cur.fetchone()
+        # reltuples is -1 until the table is analyzed for the first time
+        if not ret or ret[0] < 0:
+            return None
+        return ret[0]
+
+    return await asyncio.get_event_loop().run_in_executor(None, _)
+
+
+async def get_count(source_obj: SourceObj, sync: SyncSettings, approximate: bool):
+    # the approximate count comes from table statistics, so it never scans the table
+    count = None
+    if approximate:
+        if source_obj.type == SourceType.mysql:
+            count = await _get_mysql_approximate_count(source_obj, sync)
+        elif source_obj.type == SourceType.postgres:
+            count = await _get_postgres_approximate_count(source_obj, sync)
+        else:
+            count = await source_obj.db[sync.table].estimated_document_count()  # type: ignore
+    if count is not None:
+        return count
+    if source_obj.type == SourceType.mysql:
+        return await _get_mysql_count(source_obj, sync)
+    return await source_obj.get_count(sync)
+
+
+async def ping(source_obj: SourceObj):
+    if source_obj.type == SourceType.mysql:
+        async with SourcePool.mysql_connection(source_obj) as conn:
+            return await conn.ping()
+    return await source_obj.ping()
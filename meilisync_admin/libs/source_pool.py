@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+from meilisync.discover import get_source
+from meilisync.enums import SourceType
+from meilisync.source import Source as SourceObj
+
+from meilisync_admin.settings import settings
+
+
+class PooledSource:
+    def __init__(self, source_obj: SourceObj):
+        self.source_obj = source_obj
+        self.mysql_pool: Any = None
+        self.users = 0
+        self.discarded = False
+        self.last_used = time.monotonic()
+
+    async def close(self):
+        source_obj = self.source_obj
+        if self.mysql_pool:
+            self.mysql_pool.close()
+            await self.mysql_pool.wait_closed()
+        elif source_obj.type == SourceType.postgres:
+            source_obj.conn_dict.close()  # type: ignore
+        elif source_obj.type == SourceType.mongo:
+            source_obj.client.close()  # type: ignore
+
+
+def _create_postgres(connection: dict) -> SourceObj:
+    import psycopg2
+    from meilisync.source.postgres import CustomDictCursor, Postgres
+
+    # the constructor also opens a replication connection, which would hold a
+    # wal sender for as long as the entry is pooled, so only a plain one is made
+    source_obj = Postgres.__new__(Postgres)
+    SourceObj.__init__(source_obj, progress={}, tables=[], **connection)
+    conn = psycopg2.connect(**source_obj.kwargs, cursor_factory=CustomDictCursor)
+    # a long lived connection must not sit idle in a transaction
+    conn.autocommit = True
+    source_obj.conn_dict = conn
+    # get_current_progress only reads pg_current_wal_lsn() from it
+    source_obj.conn = conn
+    return source_obj
+
+
+class SourcePool:
+    _sources: Dict[Tuple[Optional[int], str], PooledSource] = {}
+    _mysql_pools: Dict[int, Any] = {}
+
+    @staticmethod
+    def _hash(type_: SourceType, connection: dict):
+        # a changed connection gets a new entry, the old one ages out
+        return hashlib.sha1(
+            json.dumps([type_, connection], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    @classmethod
+    async def _create(cls, type_: SourceType, connection: dict):
+        if type_ == SourceType.postgres:
+            # psycopg2 connects synchronously
+            source_obj = await asyncio.get_running_loop().run_in_executor(
+                None, _create_postgres, connection
+            )
+        else:
+            source_obj = get_source(type_)(progress={}, tables=[], **connection)
+        pooled = PooledSource(source_obj)
+        if type_ == SourceType.mysql:
+            import asyncmy
+
+            # autocommit, or a reused connection would count from an old snapshot
+            pooled.mysql_pool = await asyncmy.create_pool(
+                minsize=0,
+                maxsize=settings.SOURCE_POOL_SIZE,
+                **{**source_obj.kwargs, "autocommit": True},
+            )
+        return pooled
+
+    @classmethod
+    @asynccontextmanager
+    async def acquire(
+        cls, type_: SourceType, connection: dict, pk: Optional[int] = None
+    ):
+        key = (pk, cls._hash(type_, connection))
+        pooled = cls._sources.get(key)
+        if not pooled:
+            pooled = await cls._create(type_, connection)
+            if key in cls._sources:
+                # created concurrently by another request, keep the first one
+                await pooled.close()
+                pooled = cls._sources[key]
+            else:
+                cls._sources[key] = pooled
+                if pooled.mysql_pool:
+                    cls._mysql_pools[id(pooled.source_obj)] = pooled.mysql_pool
+        pooled.users += 1
+        try:
+            yield pooled.source_obj
+        except Exception:
+            # the connection may be broken, don't hand it out again
+            cls._discard(key, pooled)
+            raise
+        finally:
+            pooled.users -= 1
+            pooled.last_used = time.monotonic()
+            if pooled.discarded and not pooled.users:
+                await cls._close(pooled)
+
+    @classmethod
+    @asynccontextmanager
+    async def mysql_connection(cls, source_obj: SourceObj):
+        pool = cls._mysql_pools.get(id(source_obj))
+        if pool:
+            async with pool.acquire() as conn:
+                yield conn
+        else:
+            import asyncmy
+
+            async with asyncmy.connect(**source_obj.kwargs) as conn:
+                yield conn
+
+    @classmethod
+    def _discard(cls, key: Tuple[Optional[int], str], pooled: PooledSource):
+        if cls._sources.get(key) is pooled:
+            cls._sources.pop(key)
+            cls._mysql_pools.pop(id(pooled.source_obj), None)
+        pooled.discarded = True
+
+    @classmethod
+    async def _close(cls, pooled: PooledSource):
+        try:
+            await pooled.close()
+        except Exception as e:
+            logger.warning(f"Failed to close source connection: {e}")
+
+    @classmethod
+    async def evict(cls, idle: float = 0, pk: Optional[int] = None):
+        now = time.monotonic()
+        for key, pooled in list(cls._sources.items()):
+            if pk is not None and key[0] != pk:
+                continue
+            if idle and (pooled.users or now - pooled.last_used < idle):
+                continue
+            cls._discard(key, pooled)
+            if not pooled.users:
+                await cls._close(pooled)
+
+    @classmethod
+    async def run(cls):
+        while True:
+            await asyncio.sleep(settings.SOURCE_POOL_IDLE_TIMEOUT / 2)
+            await cls.evict(settings.SOURCE_POOL_IDLE_TIMEOUT)
+
+    @classmethod
+    async def close(cls):
+        await cls.evict()
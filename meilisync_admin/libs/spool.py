@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Any, List, Optional, Tuple, cast
+
+from meilisync.discover import get_progress
+from meilisync.enums import ProgressType
+from meilisync.schemas import Event, ProgressEvent
+
+from meilisync_admin.libs.event import decode_event, encode_event
+from meilisync_admin.libs.lease import FencedProgress, Lease, LeaseLost
+from meilisync_admin.libs.redis import Key, r, to_str
+from meilisync_admin.settings import settings
+
+# one round trip and one fence check for a whole batch of events
+FENCED_XADD_SCRIPT = r.register_script("""
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+for i = 2, #ARGV do
+    redis.call("XADD", KEYS[2], "*", "event", ARGV[i])
+end
+return #ARGV
+""")
+
+
+class Spool:
+    def __init__(self, source_id: int, lease: Lease):
+        self.key = Key.spool.format(source_id=source_id)
+        self.lease = lease
+        # the position of the workers in the spool, saved like a source progress
+        self.progress = FencedProgress(
+            get_progress(ProgressType.redis)(
+                dsn=settings.REDIS_URL,
+                key=Key.spool_cursor.format(source_id=source_id),
+            ),
+            lease,
+        )
+        self.length = 0
+        self.oldest_at: Optional[float] = None
+        self.stats_at = 0.0
+        self.buffer: List[bytes] = []
+        self.buffered_events = 0
+        self.buffered_progress: Optional[dict] = None
+
+    @classmethod
+    async def reset(cls, source_id: int):
+        await r.delete(
+            Key.spool.format(source_id=source_id),
+            Key.spool_cursor.format(source_id=source_id),
+        )
+
+    @property
+    def full(self):
+        return len(self.buffer) >= settings.SPOOL_APPEND_COUNT
+
+    def add(self, event: ProgressEvent):
+        if isinstance(event, Event):
+            self.buffer.append(encode_event(event))
+        if event.progress:
+            self.buffered_progress = dict(event.progress)
+        self.buffered_events += 1
+
+    async def flush(self) -> Tuple[Optional[dict], int]:
+        # returns the source position up to which the events are spooled
+        if not self.buffered_events:
+            return None, 0
+        # the source is only paused once the spool is full
+        while self.length >= settings.SPOOL_MAX_LENGTH:
+            await asyncio.sleep(1)
+            await self.refresh_stats()
+        entries, self.buffer = self.buffer, []
+        progress, self.buffered_progress = self.buffered_progress, None
+        events, self.buffered_events = self.buffered_events, 0
+        if entries:
+            if not await FENCED_XADD_SCRIPT(
+                keys=[self.lease.fence_key, self.key],
+                args=[self.lease.fence or 0, *entries],
+            ):
+                raise LeaseLost(f"Lease {self.lease.key} is lost")
+            self.length += len(entries)
+        return progress, events
+
+    async def read(self, after: str) -> List[Tuple[str, ProgressEvent]]:
+        # RESP2 replies with a list of [stream, entries], RESP3 with a dict
+        ret = cast(
+            List[List[Any]],
+            await r.xread(
+                {self.key: after}, count=settings.SPOOL_READ_COUNT, block=1000
+            ),
+        )
+        entries = []
+        for _, items in ret:
+            for entry_id, fields in items:
+                entries.append((to_str(entry_id), decode_event(fields[b"event"])))
+        return entries
+
+    async def trim(self):
+        # the entries before the saved position are written to meilisearch
+        cursor = await self.progress.get()
+        if cursor:
+            await r.xtrim(self.key, minid=cursor["spool_id"], approximate=False)
+
+    async def refresh_stats(self):
+        self.length = await r.xlen(self.key)
+        first = await r.xrange(self.key, count=1)
+        if first:
+            self.oldest_at = int(first[0][0].split(b"-")[0]) / 1000
+        else:
+            self.oldest_at = None
+        self.stats_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "length": self.length,
+            "age": round(time.time() - self.oldest_at, 3) if self.oldest_at else 0,
+        }
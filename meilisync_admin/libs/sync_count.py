@@ -0,0 +1,77 @@
+import asyncio
+import json
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from meilisync_admin.libs.redis import Key, r
+from meilisync_admin.models import Sync
+from meilisync_admin.settings import settings
+
+
+class SyncCount:
+    _tasks: Set[asyncio.Task] = set()
+    _inflight: Dict[Tuple[int, bool], asyncio.Task] = {}
+
+    @staticmethod
+    def _mode(approximate: bool):
+        return "approximate" if approximate else "exact"
+
+    @classmethod
+    async def _count(cls, sync: Sync, approximate: bool):
+        await sync.get_count(approximate)
+        counts = {
+            "source_count": sync.source_count,
+            "meilisearch_count": sync.meilisearch_count,
+            "approximate": approximate,
+            "counted_at": time.time(),
+        }
+        await r.set(
+            Key.sync_count.format(sync_id=sync.pk, mode=cls._mode(approximate)),
+            json.dumps(counts),
+            ex=settings.SYNC_COUNT_INTERVAL * 10,
+        )
+        return counts
+
+    @classmethod
+    def _single_flight(cls, sync: Sync, approximate: bool) -> asyncio.Task:
+        # concurrent requests for the same sync share one count query
+        key = (sync.pk, approximate)
+        task = cls._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(cls._count(sync, approximate))
+            cls._inflight[key] = task
+            task.add_done_callback(lambda _: cls._inflight.pop(key, None))
+        return task
+
+    @classmethod
+    async def _refresh(cls, sync: Sync, approximate: bool):
+        try:
+            await cls._single_flight(sync, approximate)
+        except Exception as e:
+            logger.warning(f'Failed to count sync "{sync.label}": {e}')
+
+    @classmethod
+    async def get(
+        cls, sync: Sync, approximate: bool = False, wait: bool = False
+    ) -> Optional[dict]:
+        mode = cls._mode(approximate)
+        cached = await r.get(Key.sync_count.format(sync_id=sync.pk, mode=mode))
+        counts = json.loads(cached) if cached else None
+        if counts and time.time() - counts["counted_at"] < settings.SYNC_COUNT_INTERVAL:
+            return counts
+        if wait:
+            # shielded so that a disconnected client doesn't cancel the shared count
+            return await asyncio.shield(cls._single_flight(sync, approximate))
+        # only one viewer in the cluster counts, the others keep the last counts
+        if await r.set(
+            Key.sync_count_lock.format(sync_id=sync.pk, mode=mode),
+            1,
+            ex=settings.SYNC_COUNT_INTERVAL,
+            nx=True,
+        ):
+            task = asyncio.create_task(cls._refresh(sync, approximate))
+            cls._tasks.add(task)
+            task.add_done_callback(cls._tasks.discard)
+        return counts
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+from meilisync.enums import EventType
+from meilisync.meili import Meili
+from meilisync.schemas import Event
+from meilisync.settings import Sync as SyncSettings
+
+from meilisync_admin.libs.event import encode_document
+from meilisync_admin.settings import settings
+
+
+class WriteBatch:
+    def __init__(
+        self,
+        seq: int,
+        events: tuple,
+        count: int,
+        received: int,
+        received_at: Optional[float],
+    ):
+        self.seq = seq
+        self.events = events
+        # the coalesced documents, and the events they were coalesced from
+        self.count = count
+        self.received = received
+        self.received_at = received_at
+        self.sent_at: Optional[float] = None
+        self.task_uids: Set[int] = set()
+        self.done = asyncio.get_running_loop().create_future()
+
+
+class MeiliWriter:
+    _writers: Dict[int, "MeiliWriter"] = {}
+
+    def __init__(self, meilisearch_id: int, meili: Meili):
+        self.meilisearch_id = meilisearch_id
+        self.meili = meili
+        self.semaphore = asyncio.Semaphore(settings.MEILI_MAX_IN_FLIGHT)
+        self.pending: Dict[int, WriteBatch] = {}
+        self.poll_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def get(cls, meilisearch_id: int, meili: Meili):
+        writer = cls._writers.get(meilisearch_id)
+        # a new client means the instance was changed, the old writer fades out
+        if not writer or writer.meili is not meili:
+            writer = cls(meilisearch_id, meili)
+            cls._writers[meilisearch_id] = writer
+        return writer
+
+    async def acquire(self):
+        # at most MEILI_MAX_IN_FLIGHT batches per instance are waiting for meilisearch
+        await self.semaphore.acquire()
+
+    def release(self):
+        self.semaphore.release()
+
+    async def send(self, batch: WriteBatch):
+        created_events, updated_events, deleted_events = batch.events
+        # a failed send is retried as a whole, writing documents is idempotent
+        batch.task_uids = set()
+        batch.sent_at = time.monotonic()
+        for event_type, events_map in (
+            (EventType.create, created_events),
+            (EventType.update, updated_events),
+            (EventType.delete, deleted_events),
+        ):
+            for sync, events in events_map.items():
+                if not events:
+                    continue
+                if event_type == EventType.delete or self.meili.plugins or sync.plugins:
+                    task = await self.meili.handle_events_by_type(
+                        sync, events, event_type
+                    )
+                    batch.task_uids.add(task.task_uid)
+                else:
+                    batch.task_uids.add(
+                        await self._send_documents(sync, events, event_type)
+                    )
+        batch.events = ()
+        if not batch.task_uids:
+            self._resolve(batch)
+            return
+        for uid in batch.task_uids:
+            self.pending[uid] = batch
+        if not self.poll_task or self.poll_task.done():
+            self.poll_task = asyncio.create_task(self._poll())
+
+    async def _send_documents(
+        self, sync: SyncSettings, events: List[Event], event_type: EventType
+    ) -> int:
+        # the documents were encoded once when the event was fanned out to the
+        # syncs of its table, so they are sent as they are
+        client = self.meili.client.http_client
+        response = await (
+            client.post if event_type == EventType.create else client.put
+        )(
+            f"indexes/{sync.index_name}/documents",
+            params={"primaryKey": sync.pk},
+            content=b"\n".join(
+                encode_document(event, sync.fields, self.meili.client.json_handler)
+                for event in events
+            ),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        return response.json()["taskUid"]
+
+    def _resolve(self, batch: WriteBatch, error: Optional[BaseException] = None):
+        self.release()
+        if batch.done.done():
+            return
+        if error:
+            batch.done.set_exception(error)
+        else:
+            batch.done.set_result(None)
+
+    def _finish(self, uid: int):
+        batch = self.pending.pop(uid, None)
+        if not batch:
+            return
+        batch.task_uids.discard(uid)
+        if not batch.task_uids:
+            self._resolve(batch)
+
+    def _expire(self):
+        # a task that never finishes must not hold its slot forever
+        now = time.monotonic()
+        for batch in set(self.pending.values()):
+            if now - (batch.sent_at or now) < settings.MEILI_TASK_TIMEOUT:
+                continue
+            for uid in batch.task_uids:
+                self.pending.pop(uid, None)
+            batch.task_uids.clear()
+            self._resolve(batch, TimeoutError("Meilisearch tasks timed out"))
+
+    async def _poll(self):
+        # one request checks the tasks of every batch in flight on this instance
+        delay = settings.MEILI_TASK_POLL_INTERVAL
+        warned_at: Optional[float] = None
+        while self.pending:
+            await asyncio.sleep(delay)
+            if self._writers.get(self.meilisearch_id) is not self:
+                for batch in set(self.pending.values()):
+                    self._resolve(batch, ConnectionError("Meilisearch client changed"))
+                self.pending.clear()
+                return
+            self._expire()
+            uids = list(self.pending)
+            if not uids:
+                return
+            try:
+                tasks = await self.meili.client.get_tasks(uids=uids, limit=len(uids))
+            except Exception as e:
+                # back off while meilisearch is unreachable, warning once a minute
+                if warned_at is None or time.monotonic() - warned_at >= 60:
+                    logger.warning(f"Failed to get Meilisearch tasks: {e}")
+                    warned_at = time.monotonic()
+                delay = min(delay * 2, settings.MEILI_TASK_POLL_MAX_INTERVAL)
+                continue
+            delay = settings.MEILI_TASK_POLL_INTERVAL
+            warned_at = None
+            found = set()
+            for task in tasks.results:
+                found.add(task.uid)
+                if task.status not in ("succeeded", "failed", "canceled"):
+                    continue
+                if task.status != "succeeded":
+                    # the documents can't be written by retrying, same as before
+                    logger.error(
+                        f'Meilisearch task {task.uid} of index "{task.index_uid}" '
+                        f"{task.status}: {task.error}"
+                    )
+                self._finish(task.uid)
+            for uid in set(uids) - found:
+                # meilisearch prunes its oldest finished tasks
+                logger.warning(f"Meilisearch task {uid} is gone, assume it finished")
+                self._finish(uid)
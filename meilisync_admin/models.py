@@ -5,10 +5,12 @@ from meilisearch_python_sdk.errors import MeilisearchApiError
 from meilisearch_python_sdk.models.settings import MeilisearchSettings
 from meilisync.discover import get_source
 from meilisync.enums import EventType, SourceType
-from meilisync.meili import Meili
 from meilisync.settings import Sync as SyncConfig
 from tortoise import Model, fields
 
+from meilisync_admin.libs.meili import MeiliClients
+from meilisync_admin.libs.source import get_count
+from meilisync_admin.libs.source_pool import SourcePool
 from meilisync_admin.validators import EmailValidator
 
 
@@ -38,6 +40,9 @@ class Source(BaseModel):
         )
         return source_obj
 
+    def acquire_source(self):
+        return SourcePool.acquire(self.type, self.connection, self.pk)
+
 
 class Sync(BaseModel):
     label = fields.CharField(max_length=255)
@@ -60,7 +65,8 @@ class Sync(BaseModel):
 
     @property
     def meili_client(self):
-        return Meili(
+        return MeiliClients.get(
+            self.meilisearch.pk,
             self.meilisearch.api_url,
             self.meilisearch.api_key,
         )
@@ -85,8 +91,9 @@ class Sync(BaseModel):
             index=self.index,
         )
 
-    async def get_count(self):
-        self.source_count = await self.source.get_source().get_count(self)
+    async def get_count(self, approximate: bool = False):
+        async with self.source.acquire_source() as source_obj:
+            self.source_count = await get_count(source_obj, self, approximate)
         try:
             self.meilisearch_count = await self.meili_client.get_count(self.index)
         except MeilisearchApiError as e:
@@ -100,6 +107,8 @@ class Meilisearch(BaseModel):
     api_key = fields.CharField(max_length=255, null=True)
     insert_size = fields.IntField(null=True)
     insert_interval = fields.IntField(null=True)
+    adaptive_batch = fields.BooleanField(default=False)
+    target_lag = fields.IntField(null=True)
 
 
 class SyncLog(BaseModel):
@@ -107,6 +116,31 @@ class SyncLog(BaseModel):
     type = fields.CharEnumField(enum_type=EventType, default=EventType.create)
     count = fields.IntField(default=0)
 
+    class Meta:
+        indexes = [("sync_id", "id"), ("type", "id"), ("created_at",)]
+
+
+class SyncLogHourly(BaseModel):
+    sync: fields.ForeignKeyRelation[Sync] = fields.ForeignKeyField("models.Sync")
+    type = fields.CharEnumField(enum_type=EventType, default=EventType.create)
+    count = fields.IntField(default=0)
+    hour = fields.DatetimeField()
+
+    class Meta:
+        unique_together = [("sync", "type", "hour")]
+        indexes = [("hour",)]
+
+
+class SyncLogDaily(BaseModel):
+    sync: fields.ForeignKeyRelation[Sync] = fields.ForeignKeyField("models.Sync")
+    type = fields.CharEnumField(enum_type=EventType, default=EventType.create)
+    count = fields.IntField(default=0)
+    date = fields.DateField()
+
+    class Meta:
+        unique_together = [("sync", "type", "date")]
+        indexes = [("date",)]
+
 
 class Admin(BaseModel):
     nickname = fields.CharField(max_length=255)
@@ -123,3 +157,6 @@ class ActionLog(BaseModel):
     content = fields.JSONField()
     path = fields.CharField(max_length=255)
     method = fields.CharField(max_length=10)
+
+    class Meta:
+        indexes = [("admin_id", "id")]
@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+from typing import Optional
+
+from loguru import logger
+from redis.exceptions import LockError
+from tortoise import timezone
+from tortoise.expressions import RawSQL
+from tortoise.functions import Sum
+from tortoise.transactions import in_transaction
+
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.redis import Key, r, to_str
+from meilisync_admin.models import SyncLog, SyncLogDaily, SyncLogHourly
+from meilisync_admin.settings import settings
+
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+
+
+def _to_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value))
+
+
+async def get_rolled_until() -> Optional[datetime.datetime]:
+    # raw sync logs before the returned hour are already in the rollup tables
+    rolled_until = await r.get(Key.sync_log_rollup)
+    if rolled_until:
+        return datetime.datetime.fromisoformat(to_str(rolled_until))
+    last = await SyncLogHourly.all().order_by("-hour").first()
+    if last:
+        return last.hour + HOUR
+    return None
+
+
+async def _rollup_day(start: datetime.datetime, end: datetime.datetime):
+    rows = (
+        await SyncLog.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(
+            total=Sum("count"),
+            day=RawSQL("date(created_at)"),
+            hour=RawSQL("hour(created_at)"),
+        )
+        .group_by("sync_id", "type", "day", "hour")
+        .values("sync_id", "type", "day", "hour", "total")
+    )
+    day_start = datetime.datetime.combine(start.date(), datetime.time(), start.tzinfo)
+    async with in_transaction():
+        for row in rows:
+            hour = datetime.datetime.combine(
+                _to_date(row["day"]), datetime.time(int(row["hour"])), start.tzinfo
+            )
+            await SyncLogHourly.update_or_create(
+                defaults={"count": row["total"]},
+                sync_id=row["sync_id"],
+                type=row["type"],
+                hour=hour,
+            )
+        rows = (
+            await SyncLogHourly.filter(hour__gte=day_start, hour__lt=day_start + DAY)
+            .annotate(total=Sum("count"))
+            .group_by("sync_id", "type")
+            .values("sync_id", "type", "total")
+        )
+        for row in rows:
+            await SyncLogDaily.update_or_create(
+                defaults={"count": row["total"]},
+                sync_id=row["sync_id"],
+                type=row["type"],
+                date=start.date(),
+            )
+
+
+async def rollup_sync_logs():
+    current_hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    start = await get_rolled_until()
+    if not start:
+        first = await SyncLog.all().order_by("created_at").first()
+        if not first:
+            return
+        start = first.created_at.replace(minute=0, second=0, microsecond=0)
+    # only complete hours are rolled up, one day per transaction
+    while start < current_hour:
+        next_day = datetime.datetime.combine(
+            start.date() + DAY, datetime.time(), start.tzinfo
+        )
+        end = min(next_day, current_hour)
+        await _rollup_day(start, end)
+        await r.set(Key.sync_log_rollup, end.isoformat())
+        start = end
+    cutoff = min(
+        timezone.now() - datetime.timedelta(days=settings.SYNC_LOG_RETENTION_DAYS),
+        start,
+    )
+    deleted = await SyncLog.filter(created_at__lt=cutoff).delete()
+    if deleted:
+        await Counter.incr("sync_log", -deleted)
+        logger.info(f"Deleted {deleted} sync logs before {cutoff}")
+
+
+async def start_rollup():
+    while True:
+        try:
+            async with r.lock(
+                Key.sync_log_rollup_lock,
+                timeout=settings.SYNC_LOG_ROLLUP_INTERVAL,
+                blocking=False,
+            ):
+                await rollup_sync_logs()
+        except LockError:
+            pass
+        except Exception as e:
+            logger.exception(f"Error when rollup sync logs: {e}")
+        await asyncio.sleep(settings.SYNC_LOG_ROLLUP_INTERVAL)
@@ -1,36 +1,318 @@
 import asyncio
+import json
+import os
+import socket
+import time
+import uuid
 from asyncio import CancelledError, Task
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set, Tuple
 
 from loguru import logger
 from meilisync.discover import get_progress
-from meilisync.enums import EventType, ProgressType
-from meilisync.event import EventCollection
+from meilisync.enums import EventType, ProgressType, SourceType
 from meilisync.meili import Meili
 from meilisync.schemas import Event
 from meilisync.settings import Sync as SyncSettings
 
+from meilisync_admin.libs.batch import AdaptiveBatch
+from meilisync_admin.libs.breaker import BreakerState, CircuitBreaker
+from meilisync_admin.libs.checkpoint import Checkpointer
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.event import CoalescingEventCollection, SharedEvent
+from meilisync_admin.libs.full_sync import FullSync
+from meilisync_admin.libs.hash_ring import HashRing
+from meilisync_admin.libs.lease import FencedProgress, Lease, LeaseLost
+from meilisync_admin.libs.meili import MeiliClients
+from meilisync_admin.libs.metrics import RollingCounter, RollingSamples
+from meilisync_admin.libs.queue import EventQueue, get_event_size
+from meilisync_admin.libs.redis import Key, r, to_str
+from meilisync_admin.libs.spool import Spool
+from meilisync_admin.libs.writer import MeiliWriter, WriteBatch
 from meilisync_admin.models import Source, Sync, SyncLog
 from meilisync_admin.settings import settings
 
 
+class SyncWorker:
+    def __init__(self, runner: "Runner", sync_setting: SyncSettings, sync: Sync):
+        self.runner = runner
+        self.sync_setting = sync_setting
+        self.sync = sync
+        self.meili: Meili = sync.meili_client
+        self.queue = EventQueue(settings.QUEUE_MAX_SIZE, settings.QUEUE_MAX_BYTES)
+        self.lock = asyncio.Lock()
+        self.collection = CoalescingEventCollection()
+        self.stats: Dict[EventType, int] = {}
+        self.received_seq = 0
+        self.buffered_seq = 0
+        self.flushed_seq = 0
+        # events are buffered until the full data sync of the table is done
+        self.ready = True
+        self.tasks: List[Task] = []
+        self.received = RollingCounter(settings.METRICS_WINDOW)
+        self.acked = RollingCounter(settings.METRICS_WINDOW)
+        self.lag = RollingSamples(settings.METRICS_WINDOW)
+        # the buffered events are only counted, a full data sync can take hours
+        self.pending_events = 0
+        self.pending_received_at: Optional[float] = None
+        self.writer = MeiliWriter.get(sync.meilisearch.pk, self.meili)
+        # flushed batches are sent in order, then acked in order once their
+        # meilisearch tasks finished, so reading never waits for meilisearch
+        self.to_send: asyncio.Queue = asyncio.Queue()
+        self.to_ack: asyncio.Queue = asyncio.Queue()
+        self.in_flight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.batch: Optional[AdaptiveBatch] = None
+        self.backlog_checked_at = 0.0
+        self.backlog = 0
+        meilisearch = sync.meilisearch
+        if meilisearch.adaptive_batch:
+            # the configured values are only the starting point
+            self.batch = AdaptiveBatch(
+                meilisearch.insert_size or settings.ADAPTIVE_BATCH_MIN_SIZE,
+                meilisearch.insert_interval or 1,
+                meilisearch.target_lag or settings.ADAPTIVE_BATCH_TARGET_LAG,
+                settings.ADAPTIVE_BATCH_MIN_SIZE,
+                settings.ADAPTIVE_BATCH_MAX_SIZE,
+                settings.ADAPTIVE_BATCH_MAX_INTERVAL,
+                settings.ADAPTIVE_BATCH_TASK_BACKLOG,
+            )
+
+    @property
+    def insert_size(self):
+        if self.batch:
+            return self.batch.size
+        return self.sync.meilisearch.insert_size
+
+    @property
+    def insert_interval(self):
+        if self.batch:
+            return self.batch.interval
+        return self.sync.meilisearch.insert_interval
+
+    async def put(self, seq: int, event: Event, size: int, received_at: float):
+        self.received_seq = seq
+        self.received.add()
+        await self.queue.put((seq, event, received_at), size)
+
+    def _ack(self, count: int, received_at: Optional[float]):
+        # events carry no source timestamp, so the lag is measured from the
+        # moment the runner read the oldest event of a batch until Meilisearch
+        # acknowledged it
+        self.acked.add(count)
+        if received_at is not None:
+            self.lag.add(time.monotonic() - received_at)
+
+    def acked_seq(self, dispatched_seq: int):
+        if self.received_seq > self.flushed_seq:
+            return self.flushed_seq
+        return dispatched_seq
+
+    async def _get_backlog(self):
+        # the task list is only polled now and then, it is a slow signal anyway
+        if (
+            time.monotonic() - self.backlog_checked_at
+            < settings.ADAPTIVE_BATCH_BACKLOG_INTERVAL
+        ):
+            return self.backlog
+        self.backlog_checked_at = time.monotonic()
+        try:
+            tasks = await self.meili.client.get_tasks(
+                index_ids=[self.sync.index],
+                statuses=["enqueued", "processing"],
+                limit=1,
+            )
+            self.backlog = tasks.total or 0
+        except Exception as e:
+            logger.warning(f'Failed to get tasks of index "{self.sync.index}": {e}')
+        return self.backlog
+
+    async def _write(self, func, *args):
+        delay = settings.SOURCE_BACKOFF_BASE
+        while True:
+            try:
+                return await func(*args)
+            except Exception as e:
+                # without a spool a failed write restarts the runner from the
+                # checkpoint, with one the source keeps being spooled meanwhile
+                if not self.runner.spool:
+                    raise
+                logger.warning(
+                    f'Failed to write to Meilisearch for sync "{self.sync.label}", '
+                    f"retry in {delay}s: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.SOURCE_BACKOFF_MAX)
+
+    async def _flush(self):
+        await self.writer.acquire()
+        count = self.collection.size
+        batch = WriteBatch(
+            self.buffered_seq,
+            self.collection.pop_events,
+            count,
+            self.pending_events,
+            self.pending_received_at,
+        )
+        self.pending_events = 0
+        self.pending_received_at = None
+        self.in_flight += 1
+        self.idle.clear()
+        self.to_send.put_nowait(batch)
+
+    async def send_batches(self):
+        batch = None
+        try:
+            while True:
+                batch = await self.to_send.get()
+                await self._write(self.writer.send, batch)
+                self.to_ack.put_nowait(batch)
+                batch = None
+        finally:
+            # batches which were never sent give their slot back
+            if batch:
+                self.writer.release()
+            while not self.to_send.empty():
+                self.to_send.get_nowait()
+                self.writer.release()
+
+    async def ack_batches(self):
+        while True:
+            batch = await self.to_ack.get()
+            await batch.done
+            # the checkpoint never passes the oldest batch still in flight
+            self.flushed_seq = batch.seq
+            if self.batch and batch.received_at is not None:
+                self.batch.observe(
+                    batch.count,
+                    time.monotonic() - batch.sent_at,
+                    time.monotonic() - batch.received_at,
+                    await self._get_backlog(),
+                )
+            self._ack(batch.received, batch.received_at)
+            self.in_flight -= 1
+            if not self.in_flight:
+                self.idle.set()
+            await self.runner.commit_progress()
+
+    async def run(self):
+        while True:
+            (seq, event, received_at), _ = await self.queue.get()
+            self.stats.setdefault(event.type, 0)
+            self.stats[event.type] += 1
+            async with self.lock:
+                if self.ready and not self.insert_size and not self.insert_interval:
+                    # the events buffered during the full data sync go first
+                    await self.idle.wait()
+                    await self._write(self.meili.handle_event, event, self.sync_setting)
+                    self.flushed_seq = seq
+                    self._ack(1, received_at)
+                    await self.runner.commit_progress()
+                else:
+                    self.collection.add_event(self.sync_setting, event)
+                    self.buffered_seq = seq
+                    self.pending_events += 1
+                    if self.pending_received_at is None:
+                        self.pending_received_at = received_at
+                    if (
+                        self.ready
+                        and self.insert_size
+                        and self.collection.size >= self.insert_size
+                    ):
+                        await self._flush()
+
+    async def start(self):
+        async with self.lock:
+            self.ready = True
+            if self.collection.size > 0:
+                await self._flush()
+
+    def metrics(self):
+        return {
+            "events_per_second": round(self.received.rate(), 2),
+            "acked_per_second": round(self.acked.rate(), 2),
+            "lag_seconds": self.lag.percentiles(50, 95, 99),
+            "queue_depth": self.queue.depth,
+            "pending_events": self.collection.size,
+            "in_flight_batches": self.in_flight,
+            "dedup_ratio": self.collection.dedup_ratio,
+            "adaptive_batch": self.batch is not None,
+            **(
+                self.batch.status()
+                if self.batch
+                else {
+                    "batch_size": self.insert_size,
+                    "batch_interval": self.insert_interval,
+                }
+            ),
+        }
+
+    def processed(self):
+        return max(self.flushed_seq, self.buffered_seq) >= self.received_seq
+
+    async def drain(self):
+        # wait for the dispatched events, then write out what is still buffered
+        while not self.processed():
+            await asyncio.sleep(0.1)
+        async with self.lock:
+            if self.ready and self.collection.size > 0:
+                await self._flush()
+        await self.idle.wait()
+        for task in self.tasks:
+            task.cancel()
+
+    async def start_interval(self):
+        while True:
+            await asyncio.sleep(self.insert_interval)
+            try:
+                async with self.lock:
+                    if self.ready and self.collection.size > 0:
+                        await self._flush()
+            except Exception as e:
+                logger.error(f"Error when insert data to Meilisearch: {e}")
+
+
 class Runner:
-    def __init__(self, source: Source):
+    _meili_semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    def __init__(self, source: Source, lease: Lease):
         self.current_progress = None
-        self.lock = None
         self.queue = None
+        self.full_sync_semaphore = asyncio.Semaphore(settings.FULL_SYNC_CONCURRENCY)
         self.source = source
         self.source_obj = None
-        self.progress = self.get_progress(source.pk)
-        self.collections_map: Dict[SyncSettings, EventCollection] = {}
-        self.tables_sync_settings_map: Dict[str, List[Tuple[SyncSettings, Sync]]] = {}
-        self.tables_map_reverse: Dict[int, str] = {}
-        self.meili_map: Dict[
-            SyncSettings,
-            Tuple[Meili, int, dict],
-        ] = {}
-        self.sync_settings: List[SyncSettings] = []
-        self._tasks: List[Task] = []
+        self.progress = FencedProgress(self.get_progress(source.pk), lease)
+        self.spool: Optional[Spool] = None
+        self.source_checkpointer: Optional[Checkpointer] = None
+        self.spool_lock = asyncio.Lock()
+        acked_progress = self.progress
+        if settings.SPOOL_ENABLED:
+            # the source position is saved once an event is spooled, the acked
+            # events only move the position in the spool
+            self.spool = Spool(source.pk, lease)
+            self.source_checkpointer = Checkpointer(
+                self.progress,
+                settings.CHECKPOINT_INTERVAL,
+                settings.CHECKPOINT_MAX_EVENTS,
+            )
+            acked_progress = self.spool.progress
+        self.checkpointer = Checkpointer(
+            acked_progress,
+            settings.CHECKPOINT_INTERVAL,
+            settings.CHECKPOINT_MAX_EVENTS,
+        )
+        self.seq = 0
+        self.committed_seq = 0
+        self.progress_map: OrderedDict[int, dict] = OrderedDict()
+        self.workers: Dict[int, SyncWorker] = {}
+        self.tables_workers_map: Dict[str, List[SyncWorker]] = {}
+        # replaced workers which still have dispatched events to write out
+        self.retiring: List[SyncWorker] = []
+        self.reload_lock = asyncio.Lock()
+        self.tasks: Set[Task] = set()
+        self.failed: asyncio.Future = asyncio.get_running_loop().create_future()
 
     @classmethod
     def get_progress(cls, source_id: int):
@@ -41,186 +323,699 @@ class Runner:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if exc_type:
             logger.exception(exc_val)
+        await self.checkpointer.flush()
+        if self.source_checkpointer:
+            await self.source_checkpointer.flush()
 
-    async def __aenter__(self):
-        self.lock = asyncio.Lock()
-        self.queue = asyncio.Queue()
-        self.stats: Dict[int, Dict[EventType, int]] = {}
-        self.current_progress = await self.progress.get()
-        syncs = (
+    async def _get_syncs(self):
+        return (
             await Sync.filter(enabled=True, source=self.source)
             .all()
             .select_related("meilisearch")
         )
-        for sync in syncs:
-            self.tables_map_reverse[sync.pk] = sync.table
-            sync_setting = SyncSettings(
-                table=sync.table,
-                pk=sync.primary_key,
-                full=sync.full_sync,
-                index=sync.index,
-                fields=sync.fields,
-            )
-            self.tables_sync_settings_map.setdefault(sync.table, []).append(
-                (sync_setting, sync)
-            )
-            self.collections_map[sync_setting] = EventCollection()
-            self.meili_map[sync_setting] = (
-                sync.meili_client,
-                sync.meilisearch.insert_interval,
-                sync.index_settings,
-            )
-            self.sync_settings.append(
-                sync_setting,
-            )
+
+    async def _create_worker(self, sync: Sync):
+        worker = SyncWorker(self, sync.sync_config, sync)
+        ss = worker.sync_setting
+        if not ss.full:
+            return worker
+        if not await worker.meili.index_exists(ss.index_name):
+            worker.ready = False
+        elif await FullSync.is_pending(self.source.pk, sync.pk, "full"):
+            # resume the full data sync interrupted by the last restart
+            worker.ready = False
+        return worker
+
+    def _set_workers(self, workers: Dict[int, SyncWorker]):
+        tables_workers_map: Dict[str, List[SyncWorker]] = {}
+        for worker in workers.values():
+            tables_workers_map.setdefault(worker.sync.table, []).append(worker)
+        # swapped in one step, so the dispatcher never sees a half updated map
+        self.workers, self.tables_workers_map = workers, tables_workers_map
+
+    async def __aenter__(self):
+        # each worker has a queue with the same limits, so a runner holds up to
+        # (workers + 1) * QUEUE_MAX_BYTES of events
+        self.queue = EventQueue(settings.QUEUE_MAX_SIZE, settings.QUEUE_MAX_BYTES)
+        self.current_progress = await self.progress.get()
+        workers = {}
+        for sync in await self._get_syncs():
+            workers[sync.pk] = await self._create_worker(sync)
+        self._set_workers(workers)
         self.source_obj = self.source.get_source(
-            self.current_progress, list(self.tables_sync_settings_map.keys())
+            self.current_progress, list(self.tables_workers_map.keys())
+        )
+        return self
+
+    async def reload(self):
+        async with self.reload_lock:
+            syncs = await self._get_syncs()
+            new_tables = {sync.table for sync in syncs} - set(self.source_obj.tables)
+            if new_tables and self.source_obj.type == SourceType.mysql:
+                # the binlog stream only reads the tables it was created with
+                return False
+            workers: Dict[int, SyncWorker] = {}
+            added = []
+            for sync in syncs:
+                worker = self.workers.get(sync.pk)
+                if (
+                    worker
+                    and worker.sync_setting == sync.sync_config
+                    and worker.sync.meilisearch_id == sync.meilisearch_id  # type: ignore
+                ):
+                    workers[sync.pk] = worker
+                    continue
+                if worker and not worker.ready:
+                    # the events buffered during the full data sync can't be moved
+                    return False
+                workers[sync.pk] = await self._create_worker(sync)
+                added.append(workers[sync.pk])
+            retired = [
+                worker
+                for pk, worker in self.workers.items()
+                if workers.get(pk) is not worker
+            ]
+            if not added and not retired:
+                return True
+            self.source_obj.tables.extend(new_tables)
+            self.retiring.extend(retired)
+            self._set_workers(workers)
+            self._spawn(self._retire(retired, added))
+            logger.info(
+                f'Reload syncs of source "{self.source.label}", '
+                f"{len(added)} added, {len(retired)} retired."
+            )
+            return True
+
+    async def _retire(self, retired: List[SyncWorker], added: List[SyncWorker]):
+        # new workers start after the old ones wrote out their events, so the
+        # events of a table are still applied in order
+        await asyncio.gather(*[worker.drain() for worker in retired])
+        for worker in retired:
+            self.retiring.remove(worker)
+        for worker in added:
+            self.start_worker(worker)
+        await self.commit_progress()
+
+    @classmethod
+    def get_meili_semaphore(cls, meilisearch_id: int):
+        semaphore = cls._meili_semaphores.get(meilisearch_id)
+        if not semaphore:
+            semaphore = asyncio.Semaphore(settings.FULL_SYNC_MEILI_CONCURRENCY)
+            cls._meili_semaphores[meilisearch_id] = semaphore
+        return semaphore
+
+    async def full_sync(self, worker: SyncWorker):
+        ss = worker.sync_setting
+        meili = worker.meili
+        full_sync = FullSync(
+            self.source.pk,
+            worker.sync.pk,
+            meili,
+            ss,
+            self.source_obj,
+            worker.insert_size or 10000,
         )
-        for ss in self.sync_settings:
-            meili, insert_interval, index_settings = self.meili_map[ss]
-            if ss.full and not await meili.index_exists(ss.index_name):
+        async with self.full_sync_semaphore, self.get_meili_semaphore(
+            worker.sync.meilisearch.pk
+        ):
+            exists = await meili.index_exists(ss.index_name)
+            # a missing index is loaded from the start, even if a load was pending
+            await full_sync.start("full", restart=not exists)
+            if not exists:
                 await meili.client.create_index(ss.index_name, primary_key=ss.pk)
-                await meili.client.index(ss.index_name).update_settings(index_settings)
-                _, count = await meili.add_full_data(
-                    ss,
-                    self.source_obj.get_full_data(ss, insert_interval or 10000),
-                )
-                if count > 0:
-                    logger.info(
-                        f'Full data sync for table "{self.source.label}.{ss.table}" '
-                        f"done! {count} documents added."
-                    )
-                else:
-                    logger.info(
-                        f'Full data sync for table "{self.source.label}.{ss.table}" '
-                        "done! No data found."
-                    )
-            if insert_interval:
-                self._tasks.append(
-                    asyncio.create_task(
-                        self.start_interval(
-                            meili, self.collections_map[ss], insert_interval
-                        )
-                    )
+                await meili.client.index(ss.index_name).update_settings(
+                    worker.sync.index_settings
                 )
-        return self
+            count, _ = await full_sync.load(ss.index_name, "full")
+        if count > 0:
+            logger.info(
+                f'Full data sync for table "{self.source.label}.{ss.table}" '
+                f"done! {count} documents added."
+            )
+        else:
+            logger.info(
+                f'Full data sync for table "{self.source.label}.{ss.table}" '
+                "done! No data found."
+            )
+        # apply the events buffered while the full data was loading
+        await worker.start()
 
     async def save_stats(self):
         while True:
             await asyncio.sleep(60)
-            async with self.lock:
-                objs = []
-                for sync_id, events in self.stats.items():
-                    total = 0
-                    for event_type, count in events.items():
-                        total += count
-                        objs.append(
-                            SyncLog(sync_id=sync_id, count=count, type=event_type)
-                        )
-                    stats_str = ", ".join(
-                        f"{event_type.name}: {count}"
-                        for event_type, count in events.items()
-                    )
-                    logger.info(
-                        f'Save {total} sync logs for table "{self.source.label}'
-                        f'.{self.tables_map_reverse[sync_id]}", {stats_str}'
+            objs = []
+            for worker in [*self.workers.values(), *self.retiring]:
+                stats, worker.stats = worker.stats, {}
+                total = 0
+                for event_type, count in stats.items():
+                    total += count
+                    objs.append(
+                        SyncLog(sync_id=worker.sync.pk, count=count, type=event_type)
                     )
-                if not objs:
+                if not stats:
                     continue
-                await SyncLog.bulk_create(objs)
-                self.stats.clear()
+                stats_str = ", ".join(
+                    f"{event_type.name}: {count}" for event_type, count in stats.items()
+                )
+                logger.info(
+                    f'Save {total} sync logs for table "{self.source.label}'
+                    f'.{worker.sync.table}", {stats_str}'
+                )
+            if not objs:
+                continue
+            await SyncLog.bulk_create(objs)
+            await Counter.incr("sync_log", len(objs))
 
-    async def _save_progress(self):
-        await self.progress.set(**self.current_progress)
+    async def commit_progress(self):
+        # only the progress that every worker has flushed past is safe to save
+        acked_seq = min(
+            (
+                worker.acked_seq(self.seq)
+                for worker in [*self.workers.values(), *self.retiring]
+            ),
+            default=self.seq,
+        )
+        seq, progress = 0, None
+        while self.progress_map and next(iter(self.progress_map)) <= acked_seq:
+            seq, progress = self.progress_map.popitem(last=False)
+        if progress is None:
+            return
+        events, self.committed_seq = seq - self.committed_seq, seq
+        self.current_progress = progress
+        await self.checkpointer.mark(progress, events)
+
+    def _track_progress(self, seq: int, progress: dict):
+        self.progress_map[seq] = progress
+        if len(self.progress_map) <= settings.PROGRESS_MAP_MAX_SIZE:
+            return
+        # a worker still loading its full data pins the checkpoint, so every
+        # other pair of positions is thinned to the newer one, the checkpoint
+        # can only fall further behind which is safe
+        items = list(self.progress_map.items())
+        self.progress_map = OrderedDict(items[(len(items) - 1) % 2 :: 2])
 
     async def sync_data(self):
         while True:
-            event = await self.queue.get()
-            self.current_progress = event.progress
-            if not isinstance(event, Event):
-                await self._save_progress()
-                continue
-            ss_list = self.tables_sync_settings_map.get(event.table)
-            if not ss_list:
-                continue
-            async with self.lock:
-                for ss, sync_model in ss_list:
-                    m, _, _ = self.meili_map[ss]
-                    meilisearch = sync_model.meilisearch
-                    self.stats.setdefault(sync_model.pk, {}).setdefault(event.type, 0)
-                    self.stats[sync_model.pk][event.type] += 1
-                    if not meilisearch.insert_size and not meilisearch.insert_interval:
-                        await m.handle_event(event, ss)
-                        await self._save_progress()
-                    else:
-                        collection = self.collections_map[ss]
-                        collection.add_event(ss, event)
-                        if collection.size >= meilisearch.insert_size:
-                            await m.handle_events(collection)
-                            await self._save_progress()
+            (event, received_at), size = await self.queue.get()
+            self.seq += 1
+            if event.progress:
+                self._track_progress(self.seq, dict(event.progress))
+            if isinstance(event, Event):
+                workers = self.tables_workers_map.get(event.table, [])
+                if len(workers) > 1:
+                    event = SharedEvent.share(event)
+                for worker in workers:
+                    await worker.put(self.seq, event, size, received_at)
+            await self.commit_progress()
 
     async def listen(self):
         logger.info(
             f'Start increment sync data from "{self.source.label}" to Meilisearch,'
-            f' tables: {", ".join(self.tables_sync_settings_map.keys())}...'
+            f' tables: {", ".join(self.tables_workers_map.keys())}...'
         )
         async for event in self.source_obj:
             logger.debug(event)
-            await self.queue.put(event)
+            if self.spool:
+                self.spool.add(event)
+                if self.spool.full:
+                    await self.flush_spool()
+                continue
+            # blocks while the queue is full, which pauses reading from mysql and
+            # mongo, the postgres source keeps filling its own unbounded queue
+            # from the replication thread, so it is not bounded by this
+            await self.queue.put((event, time.monotonic()), get_event_size(event))
 
-    async def start_interval(self, m: Meili, c: EventCollection, interval: int):
+    async def flush_spool(self):
+        async with self.spool_lock:
+            progress, events = await self.spool.flush()
+            # the source position is only saved once its events are spooled
+            if progress:
+                await self.source_checkpointer.mark(progress, events)
+
+    async def keep_flushing_spool(self):
+        # a quiet source still gets its last events spooled
         while True:
-            await asyncio.sleep(interval)
-            try:
-                async with self.lock:  # type: ignore
-                    size = c.size
-                    await m.handle_events(c)
-                    if size > 0:
-                        await self._save_progress()
-            except Exception as e:
-                logger.error(f"Error when insert data to Meilisearch: {e}")
+            await asyncio.sleep(settings.SPOOL_APPEND_INTERVAL)
+            await self.flush_spool()
+
+    async def read_spool(self):
+        cursor = await self.spool.progress.get()
+        after = cursor.get("spool_id", "0-0")
+        while True:
+            if time.monotonic() - self.spool.stats_at >= 1:
+                await self.spool.trim()
+                await self.spool.refresh_stats()
+            for entry_id, event in await self.spool.read(after):
+                after = entry_id
+                # the workers ack the position in the spool instead of the source
+                event.progress = {"spool_id": entry_id}
+                spooled_at = int(entry_id.split("-")[0]) / 1000
+                await self.queue.put(
+                    (event, time.monotonic() - max(time.time() - spooled_at, 0)),
+                    get_event_size(event),
+                )
+
+    def status(self):
+        return {
+            "queue": self.queue.stats(),
+            "spool": self.spool.stats() if self.spool else None,
+            "syncs": {
+                worker.sync.pk: {
+                    "queue": worker.queue.stats(),
+                    "metrics": worker.metrics(),
+                }
+                for worker in self.workers.values()
+            },
+        }
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: Task):
+        self.tasks.discard(task)
+        if task.cancelled():
+            return
+        exception = task.exception()
+        # any failing task fails the whole runner
+        if exception and not self.failed.done():
+            self.failed.set_exception(exception)
+
+    def start_worker(self, worker: SyncWorker):
+        worker.tasks.append(self._spawn(worker.run()))
+        worker.tasks.append(self._spawn(worker.send_batches()))
+        worker.tasks.append(self._spawn(worker.ack_batches()))
+        if not worker.ready:
+            worker.tasks.append(self._spawn(self.full_sync(worker)))
+        if worker.insert_interval:
+            worker.tasks.append(self._spawn(worker.start_interval()))
 
     async def run(self):
-        await asyncio.gather(
-            self.save_stats(), self.sync_data(), self.listen(), *self._tasks
-        )
+        self._spawn(self.save_stats())
+        self._spawn(self.sync_data())
+        self._spawn(self.listen())
+        self._spawn(self.checkpointer.run())
+        if self.spool:
+            self._spawn(self.read_spool())
+            self._spawn(self.keep_flushing_spool())
+            self._spawn(self.source_checkpointer.run())
+        for worker in self.workers.values():
+            self.start_worker(worker)
+        try:
+            await self.failed
+        finally:
+            tasks = list(self.tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 
 class Scheduler:
+    node_id = uuid.uuid4().hex
+    started_at = time.time()
     _tasks: Dict[int, Task] = {}
+    _runners: Dict[int, Runner] = {}
+    _leases: Dict[int, Lease] = {}
+    _breakers: Dict[int, CircuitBreaker] = {}
+    _pending: Dict[int, Tuple[str, float, Task]] = {}
+
+    @classmethod
+    async def run(cls):
+        # every node heartbeats into the registry and runs the sources that the
+        # consistent hash ring assigns to it, each guarded by its own lease
+        await asyncio.gather(cls._keep_sources(), cls._listen_commands())
+
+    @classmethod
+    async def _keep_sources(cls):
+        while True:
+            try:
+                await cls._rebalance()
+            except Exception as e:
+                logger.exception(f"Error when rebalance sources: {e}")
+            await asyncio.sleep(settings.SCHEDULER_LEASE_TTL / 3)
+
+    @classmethod
+    async def _heartbeat(cls):
+        info = {
+            "id": cls.node_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started_at": cls.started_at,
+            "heartbeat_at": time.time(),
+            "sources": {
+                source_id: cls._get_source_status(source_id) for source_id in cls._tasks
+            },
+        }
+        async with r.pipeline() as pipe:
+            pipe.sadd(Key.scheduler_nodes, cls.node_id)
+            pipe.set(
+                Key.scheduler_node.format(node_id=cls.node_id),
+                json.dumps(info),
+                ex=settings.SCHEDULER_LEASE_TTL,
+            )
+            await pipe.execute()
+
+    @classmethod
+    def _get_source_status(cls, source_id: int):
+        status = {}
+        breaker = cls._breakers.get(source_id)
+        if breaker:
+            status.update(breaker.status())
+        runner = cls._runners.get(source_id)
+        if runner:
+            status.update(runner.status())
+        return status
+
+    @classmethod
+    async def get_nodes(cls):
+        node_ids = sorted(
+            node_id.decode() for node_id in await r.smembers(Key.scheduler_nodes)
+        )
+        if not node_ids:
+            return []
+        values = await r.mget(
+            [Key.scheduler_node.format(node_id=node_id) for node_id in node_ids]
+        )
+        nodes = []
+        for node_id, value in zip(node_ids, values):
+            if value:
+                nodes.append(json.loads(value))
+            else:
+                # the heartbeat of a dead node expires with its key
+                await r.srem(Key.scheduler_nodes, node_id)
+        return nodes
+
+    @classmethod
+    async def _get_ring(cls):
+        return HashRing(node["id"] for node in await cls.get_nodes())
+
+    @classmethod
+    async def _rebalance(cls):
+        await cls._heartbeat()
+        ring = await cls._get_ring()
+        sources = {source.pk: source for source in await Source.all()}
+        paused = set()
+        if sources:
+            values = await r.mget(
+                [Key.scheduler_pause.format(source_id=pk) for pk in sources]
+            )
+            paused = {pk for pk, value in zip(sources, values) if value}
+        for source_id in list(cls._tasks):
+            if (
+                source_id not in sources
+                or source_id in paused
+                or ring.get(str(source_id)) != cls.node_id
+                or cls._tasks[source_id].done()
+                or not await cls._leases[source_id].renew()
+            ):
+                await cls._stop_source(source_id)
+        for source_id, source in sources.items():
+            if (
+                source_id in cls._tasks
+                or source_id in paused
+                or ring.get(str(source_id)) != cls.node_id
+            ):
+                continue
+            await cls._acquire_source(source)
+
+    @classmethod
+    async def _acquire_source(cls, source: Source):
+        lease = Lease(
+            f"source:{source.pk}", settings.SCHEDULER_LEASE_TTL, token=cls.node_id
+        )
+        # the previous owner still holds the lease until it stops or expires
+        if not await lease.acquire():
+            return
+        logger.info(
+            f'Source "{source.label}" acquired with fence {lease.fence}, start it...'
+        )
+        cls._leases[source.pk] = lease
+        # a refresh that held the pause until it expired died with its process
+        syncs = await Sync.filter(source_id=source.pk).only("id")
+        await FullSync.interrupt(source.pk, [sync.pk for sync in syncs])
+        cls._tasks[source.pk] = asyncio.ensure_future(cls._start_source(source, lease))
+
+    @classmethod
+    async def _listen_commands(cls):
+        while True:
+            try:
+                async with r.pubsub() as pubsub:
+                    await pubsub.subscribe(Key.scheduler_channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            await cls._handle_command(json.loads(message["data"]))
+            except Exception as e:
+                logger.exception(f"Error when listen scheduler commands: {e}")
+                await asyncio.sleep(1)
+
+    @classmethod
+    async def _handle_command(cls, command: dict):
+        if command["action"] == "invalidate":
+            for pk in command["meilisearch_ids"]:
+                await MeiliClients.invalidate(pk)
+            return
+        for source_id in command["source_ids"]:
+            await cls._handle_source_command(source_id, command["action"])
+
+    @classmethod
+    async def _handle_source_command(cls, source_id: int, action: str):
+        if action == "remove":
+            pending = cls._pending.pop(source_id, None)
+            if pending:
+                pending[2].cancel()
+            await cls._stop_source(source_id)
+            return
+        # bulk changes send one command per row, so they are applied once per
+        # source after the commands stop coming in
+        first_at = time.monotonic()
+        pending = cls._pending.get(source_id)
+        if pending:
+            pending_action, first_at, task = pending
+            task.cancel()
+            if pending_action == "restart":
+                action = "restart"
+        delay = min(
+            settings.SCHEDULER_DEBOUNCE,
+            first_at + settings.SCHEDULER_DEBOUNCE_MAX - time.monotonic(),
+        )
+        task = asyncio.ensure_future(cls._apply_command(source_id, action, delay))
+        cls._pending[source_id] = (action, first_at, task)
+
+    @classmethod
+    async def _apply_command(cls, source_id: int, action: str, delay: float):
+        await asyncio.sleep(max(delay, 0))
+        del cls._pending[source_id]
+        try:
+            await cls._apply_action(source_id, action)
+        except Exception as e:
+            logger.exception(f"Error when {action} source {source_id}: {e}")
 
     @classmethod
-    async def startup(cls):
-        sources = await Source.all()
-        for source in sources:
-            cls._tasks[source.pk] = asyncio.ensure_future(cls._start_source(source))
+    async def _apply_action(cls, source_id: int, action: str):
+        if action == "reload":
+            runner = cls._runners.get(source_id)
+            if runner and await runner.reload():
+                return
+            source = await Source.get_or_none(pk=source_id)
+            if source and source_id in cls._tasks:
+                await cls._restart_source(source)
+        elif action == "restart":
+            source = await Source.get_or_none(pk=source_id)
+            if not source:
+                await cls._stop_source(source_id)
+            elif source_id in cls._tasks:
+                await cls._restart_source(source)
+            elif (await cls._get_ring()).get(str(source_id)) == cls.node_id:
+                await cls._acquire_source(source)
 
     @classmethod
-    async def _start_source(cls, source: Source):
-        async with Runner(source) as runner:
+    async def _start_source(cls, source: Source, lease: Lease):
+        breaker = cls._breakers.setdefault(
+            source.pk,
+            CircuitBreaker(
+                settings.SOURCE_BREAKER_THRESHOLD,
+                settings.SOURCE_BREAKER_TIMEOUT,
+                settings.SOURCE_BACKOFF_BASE,
+                settings.SOURCE_BACKOFF_MAX,
+            ),
+        )
+        while True:
             try:
-                await runner.run()
+                async with Runner(source, lease) as runner:
+                    cls._runners[source.pk] = runner
+                    breaker.success()
+                    try:
+                        await runner.run()
+                    finally:
+                        if cls._runners.get(source.pk) is runner:
+                            del cls._runners[source.pk]
             except CancelledError:
-                pass
+                return
+            except LeaseLost:
+                logger.warning(f'Stop source "{source.label}" as the lease is lost')
+                return
             except Exception as e:
-                logger.exception(f"Error when sync data: {e}")
-                await cls.restart_source(source)
+                task = asyncio.current_task()
+                if task and task.cancelling():
+                    # the runner failed while stopping, e.g. its last checkpoint
+                    # flush, it must still stop instead of being retried
+                    logger.exception(f'Error when stop source "{source.label}": {e}')
+                    raise CancelledError from e
+                delay = breaker.failure(e)
+                logger.exception(
+                    f'Error when sync data of source "{source.label}", '
+                    f"{breaker.state.value} and retry in {delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(delay)
 
     @classmethod
-    def shutdown(cls):
-        for task in cls._tasks.values():
+    async def _stop_source(cls, source_id: int):
+        cls._breakers.pop(source_id, None)
+        task = cls._tasks.pop(source_id, None)
+        if task:
             task.cancel()
+            # let the runner flush its last checkpoint before the lease is given up
+            await asyncio.gather(task, return_exceptions=True)
+        lease = cls._leases.pop(source_id, None)
+        if lease:
+            await lease.release()
+
+    @classmethod
+    async def shutdown(cls):
+        for _, _, task in cls._pending.values():
+            task.cancel()
+        cls._pending.clear()
+        await asyncio.gather(
+            *[cls._stop_source(source_id) for source_id in list(cls._tasks)]
+        )
+        await r.srem(Key.scheduler_nodes, cls.node_id)
+        await r.delete(Key.scheduler_node.format(node_id=cls.node_id))
+
+    @classmethod
+    async def get_status(cls, source_id: int):
+        owner = await r.get(Key.lease.format(name=f"source:{source_id}"))
+        if not owner:
+            return {"running": False}
+        node_id = to_str(owner)
+        node = await r.get(Key.scheduler_node.format(node_id=node_id))
+        status = json.loads(node)["sources"].get(str(source_id)) if node else None
+        if not status:
+            return {"running": False}
+        return {
+            "running": status.get("state") == BreakerState.running,
+            "node": node_id,
+            **status,
+        }
 
     @classmethod
-    def remove_source(cls, source_id: int):
+    async def _restart_source(cls, source: Source):
+        logger.info(f'Restart source "{source.label}"...')
+        source_id = source.pk
+        lease = cls._leases.get(source_id)
+        if not lease:
+            return
+        # a manual restart closes the circuit
+        cls._breakers.pop(source_id, None)
         task = cls._tasks.get(source_id)
         if task:
             task.cancel()
-            del cls._tasks[source_id]
+            # the new runner must read the checkpoint the old one flushes last
+            await asyncio.gather(task, return_exceptions=True)
+            if cls._tasks.get(source_id) is not task:
+                # stopped or restarted by someone else meanwhile
+                return
+        if cls._leases.get(source_id) is not lease:
+            return
+        cls._tasks[source_id] = asyncio.ensure_future(cls._start_source(source, lease))
+
+    @classmethod
+    async def _publish(cls, action: str, source_ids: List[int]):
+        # one message for a bulk change, which is applied once per source
+        await r.publish(
+            Key.scheduler_channel,
+            json.dumps({"action": action, "source_ids": source_ids}),
+        )
+
+    @classmethod
+    async def _pause(cls, source_ids: List[int]):
+        # the sources stay stopped on every node until they are restarted, or
+        # until the pause expires when its holder is gone
+        async with r.pipeline() as pipe:
+            for pk in source_ids:
+                pipe.set(
+                    Key.scheduler_pause.format(source_id=pk),
+                    cls.node_id,
+                    ex=settings.SCHEDULER_LEASE_TTL,
+                )
+            await pipe.execute()
+
+    @classmethod
+    async def invalidate_meilisearch(cls, meilisearch_ids: List[int]):
+        # every process caches its own clients, the other ones drop theirs too
+        for pk in meilisearch_ids:
+            await MeiliClients.invalidate(pk)
+        await r.publish(
+            Key.scheduler_channel,
+            json.dumps({"action": "invalidate", "meilisearch_ids": meilisearch_ids}),
+        )
+
+    @classmethod
+    async def remove_sources(cls, source_ids: List[int], wait: bool = False):
+        if not source_ids:
+            return
+        await cls._pause(source_ids)
+        await cls._publish("remove", source_ids)
+        if not wait:
+            return
+        # the leases are released once the owners have flushed their checkpoints
+        keys = [Key.lease.format(name=f"source:{pk}") for pk in source_ids]
+        deadline = time.monotonic() + settings.SCHEDULER_LEASE_TTL
+        while await r.exists(*keys) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+    @classmethod
+    async def remove_source(cls, source_id: int, wait: bool = False):
+        await cls.remove_sources([source_id], wait)
+
+    @classmethod
+    async def _keep_paused(cls, source_id: int):
+        while True:
+            await asyncio.sleep(settings.SCHEDULER_LEASE_TTL / 3)
+            await cls._pause([source_id])
+
+    @classmethod
+    @asynccontextmanager
+    async def pause_source(cls, source: Source):
+        # stopped while the caller works on it, then restarted
+        task = asyncio.ensure_future(cls._keep_paused(source.pk))
+        try:
+            await cls.remove_source(source.pk, wait=True)
+            yield
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await cls.restart_source(source)
+
+    @classmethod
+    async def reload_sources(cls, source_ids: List[int]):
+        # applies the changed syncs without restarting the whole sources
+        if source_ids:
+            await cls._publish("reload", source_ids)
+
+    @classmethod
+    async def reload_source(cls, source: Source):
+        await cls.reload_sources([source.pk])
+
+    @classmethod
+    async def restart_sources(cls, source_ids: List[int]):
+        if not source_ids:
+            return
+        await r.delete(*[Key.scheduler_pause.format(source_id=pk) for pk in source_ids])
+        await cls._publish("restart", source_ids)
 
     @classmethod
     async def restart_source(cls, source: Source):
-        logger.info(f'Restart source "{source.label}"...')
-        source_id = source.pk
-        cls.remove_source(source_id)
-        cls._tasks[source_id] = asyncio.ensure_future(cls._start_source(source))
+        await cls.restart_sources([source.pk])
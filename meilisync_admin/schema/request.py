@@ -31,3 +31,10 @@ class Query(BaseModel):
                 else:
                     orders.append(f"-{field}")
         return orders
+
+
+class CursorQuery(BaseModel):
+    limit: int = 10
+    cursor: int | None = None
+    order: Order = Order.desc
+    estimate_total: bool = False
@@ -16,6 +16,45 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str | None = None
     GITHUB_CLIENT_ID: str | None = None
     GITHUB_CLIENT_SECRET: str | None = None
+    QUEUE_MAX_SIZE: int = 10000
+    QUEUE_MAX_BYTES: int = 64 * 1024 * 1024
+    CHECKPOINT_INTERVAL: float = 1
+    CHECKPOINT_MAX_EVENTS: int = 1000
+    PROGRESS_MAP_MAX_SIZE: int = 1000
+    FULL_SYNC_CONCURRENCY: int = 4
+    FULL_SYNC_MEILI_CONCURRENCY: int = 4
+    SYNC_LOG_ROLLUP_INTERVAL: int = 600
+    SYNC_LOG_RETENTION_DAYS: int = 30
+    STAT_CACHE_EXPIRE: int = 10
+    COUNTER_EXPIRE: int = 3600
+    SCHEDULER_LEASE_TTL: int = 10
+    SCHEDULER_PROCESSES: int = 0
+    SCHEDULER_DEBOUNCE: float = 0.5
+    SCHEDULER_DEBOUNCE_MAX: float = 5
+    SOURCE_BACKOFF_BASE: float = 1
+    SOURCE_BACKOFF_MAX: float = 60
+    SOURCE_BREAKER_THRESHOLD: int = 5
+    SOURCE_BREAKER_TIMEOUT: float = 300
+    METRICS_WINDOW: int = 60
+    SSE_INTERVAL: float = 2
+    SYNC_COUNT_INTERVAL: int = 60
+    SOURCE_POOL_SIZE: int = 2
+    SOURCE_POOL_IDLE_TIMEOUT: float = 300
+    ADAPTIVE_BATCH_MIN_SIZE: int = 100
+    ADAPTIVE_BATCH_MAX_SIZE: int = 50000
+    ADAPTIVE_BATCH_MAX_INTERVAL: float = 30
+    ADAPTIVE_BATCH_TARGET_LAG: float = 5
+    ADAPTIVE_BATCH_TASK_BACKLOG: int = 20
+    ADAPTIVE_BATCH_BACKLOG_INTERVAL: float = 5
+    MEILI_MAX_IN_FLIGHT: int = 8
+    MEILI_TASK_POLL_INTERVAL: float = 0.2
+    MEILI_TASK_POLL_MAX_INTERVAL: float = 5
+    MEILI_TASK_TIMEOUT: float = 3600
+    SPOOL_ENABLED: bool = False
+    SPOOL_MAX_LENGTH: int = 1000000
+    SPOOL_READ_COUNT: int = 1000
+    SPOOL_APPEND_COUNT: int = 500
+    SPOOL_APPEND_INTERVAL: float = 0.1
 
     @property
     def enable_github_oauth(self):
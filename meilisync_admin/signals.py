@@ -1,31 +1,48 @@
 from tortoise.signals import post_delete, post_save
 
-from meilisync_admin.models import Meilisearch, Source, Sync
+from meilisync_admin.libs.counter import Counter
+from meilisync_admin.libs.source_pool import SourcePool
+from meilisync_admin.libs.spool import Spool
+from meilisync_admin.models import ActionLog, Admin, Meilisearch, Source, Sync
 from meilisync_admin.scheduler import Scheduler
+from meilisync_admin.settings import settings
 
 
 @post_save(Source)
 async def post_save_source(
     sender: Source, instance: Source, created: bool, using_db: bool, update_fields: list
 ):
+    if created:
+        await Counter.incr("source")
+    else:
+        await SourcePool.evict(pk=instance.pk)
     await Scheduler.restart_source(instance)
 
 
 @post_delete(Source)
 async def post_delete_source(sender: Source, instance: Source, using_db: bool):
-    await Scheduler.remove_source(instance.pk)
+    await Counter.incr("source", -1)
+    await Counter.reset("sync", "sync_log")
+    await SourcePool.evict(pk=instance.pk)
+    # the runner must stop appending before its spool is dropped
+    await Scheduler.remove_source(instance.pk, wait=settings.SPOOL_ENABLED)
+    await Spool.reset(instance.pk)
 
 
 @post_save(Sync)
 async def post_save_sync(
     sender: Sync, instance: Sync, created: bool, using_db: bool, update_fields: list
 ):
-    await Scheduler.restart_source(await instance.source)
+    if created:
+        await Counter.incr("sync")
+    await Scheduler.reload_source(await instance.source)
 
 
 @post_delete(Sync)
 async def post_delete_sync(sender: Sync, instance: Sync, using_db: bool):
-    await Scheduler.restart_source(await instance.source)
+    await Counter.incr("sync", -1)
+    await Counter.reset("sync_log")
+    await Scheduler.reload_source(await instance.source)
 
 
 @post_save(Meilisearch)
@@ -37,14 +54,44 @@ async def post_save_meili(
     update_fields: list,
 ):
     if created:
+        await Counter.incr("meilisearch")
         return
     syncs = await Sync.filter(meilisearch=instance).all().select_related("source")
     for sync in syncs:
         await Scheduler.restart_source(sync.source)
+    await Scheduler.invalidate_meilisearch([instance.pk])
 
 
 @post_delete(Meilisearch)
 async def post_delete_meili(sender: Meilisearch, instance: Meilisearch, using_db: bool):
+    await Counter.incr("meilisearch", -1)
+    await Counter.reset("sync", "sync_log")
     syncs = await Sync.filter(meilisearch=instance).all().select_related("source")
     for sync in syncs:
         await Scheduler.restart_source(sync.source)
+    await Scheduler.invalidate_meilisearch([instance.pk])
+
+
+@post_save(Admin)
+async def post_save_admin(
+    sender: Admin, instance: Admin, created: bool, using_db: bool, update_fields: list
+):
+    # only active admins are counted, so recount on any change
+    await Counter.reset("admin")
+
+
+@post_delete(Admin)
+async def post_delete_admin(sender: Admin, instance: Admin, using_db: bool):
+    await Counter.reset("admin", "action_log")
+
+
+@post_save(ActionLog)
+async def post_save_action_log(
+    sender: ActionLog,
+    instance: ActionLog,
+    created: bool,
+    using_db: bool,
+    update_fields: list,
+):
+    if created:
+        await Counter.incr("action_log")
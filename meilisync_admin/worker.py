@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import signal
+import socket
+import time
+from multiprocessing.process import BaseProcess
+from typing import List, Optional
+
+from loguru import logger
+from tortoise import Tortoise
+
+from meilisync_admin.libs.lease import Lease
+from meilisync_admin.libs.meili import MeiliClients
+from meilisync_admin.log import init_logging
+from meilisync_admin.scheduler import Scheduler
+from meilisync_admin.settings import TORTOISE_ORM, settings
+
+
+async def _run():
+    init_logging()
+    await Tortoise.init(config=TORTOISE_ORM)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    # each worker process joins the cluster as a scheduler node of its own
+    scheduler_task = asyncio.create_task(Scheduler.run())
+    await stop.wait()
+    scheduler_task.cancel()
+    await Scheduler.shutdown()
+    await MeiliClients.close()
+    await Tortoise.close_connections()
+
+
+def run_worker():
+    asyncio.run(_run())
+
+
+class Supervisor:
+    _processes: List[Optional[BaseProcess]] = []
+    _started_at: List[float] = []
+    _delays: List[float] = []
+    _start_at: List[float] = []
+
+    @classmethod
+    async def run(cls, count: int):
+        # uvicorn can run several app processes, only one of them per node
+        # spawns the scheduler workers
+        lease = Lease(
+            f"supervisor:{socket.gethostname()}", settings.SCHEDULER_LEASE_TTL
+        )
+        context = multiprocessing.get_context("spawn")
+        cls._processes = [None] * count
+        cls._started_at = [0.0] * count
+        cls._delays = [0.0] * count
+        cls._start_at = [0.0] * count
+        try:
+            while True:
+                try:
+                    if await lease.acquire():
+                        cls._keep_processes(context)
+                    elif any(cls._processes):
+                        logger.warning(
+                            "Supervisor lease is lost, stop scheduler workers"
+                        )
+                        await cls._stop_processes()
+                except Exception as e:
+                    logger.exception(f"Error when supervise scheduler workers: {e}")
+                await asyncio.sleep(1)
+        finally:
+            await lease.release()
+
+    @classmethod
+    def _keep_processes(cls, context):
+        now = time.monotonic()
+        for i, process in enumerate(cls._processes):
+            if process and process.is_alive():
+                continue
+            if process:
+                # a worker that keeps crashing is restarted with backoff
+                if now - cls._started_at[i] >= settings.SOURCE_BACKOFF_MAX:
+                    cls._delays[i] = 0
+                cls._delays[i] = min(
+                    max(cls._delays[i] * 2, settings.SOURCE_BACKOFF_BASE),
+                    settings.SOURCE_BACKOFF_MAX,
+                )
+                cls._start_at[i] = now + cls._delays[i]
+                cls._processes[i] = None
+                logger.warning(
+                    f"Scheduler worker {process.pid} exited with code "
+                    f"{process.exitcode}, restart it in {cls._delays[i]:.0f}s..."
+                )
+            if now < cls._start_at[i]:
+                continue
+            process = context.Process(
+                target=run_worker, name=f"meilisync-scheduler-{i}", daemon=True
+            )
+            process.start()
+            logger.info(f"Scheduler worker {process.pid} started")
+            cls._processes[i] = process
+            cls._started_at[i] = now
+
+    @classmethod
+    async def _stop_processes(cls):
+        processes = [process for process in cls._processes if process]
+        cls._processes = [None] * len(cls._processes)
+        for process in processes:
+            process.terminate()
+        loop = asyncio.get_running_loop()
+        for process in processes:
+            # give the runners time to flush their last checkpoint
+            await loop.run_in_executor(None, process.join, settings.SCHEDULER_LEASE_TTL)
+            if process.is_alive():
+                process.kill()
+
+    @classmethod
+    async def shutdown(cls):
+        await cls._stop_processes()
+        cls._processes = []
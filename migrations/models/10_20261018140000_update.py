@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `meilisearch` ADD `adaptive_batch` BOOL NOT NULL  DEFAULT 0;
+        ALTER TABLE `meilisearch` ADD `target_lag` INT;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `meilisearch` DROP COLUMN `adaptive_batch`;
+        ALTER TABLE `meilisearch` DROP COLUMN `target_lag`;"""
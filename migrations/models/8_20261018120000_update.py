@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `synclog` ADD INDEX `idx_synclog_sync_id_89798b` (`sync_id`, `id`);
+        ALTER TABLE `synclog` ADD INDEX `idx_synclog_type_baf3f0` (`type`, `id`);
+        ALTER TABLE `actionlog` ADD INDEX `idx_actionlog_admin_i_1eca7f` (`admin_id`, `id`);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `synclog` DROP INDEX `idx_synclog_sync_id_89798b`;
+        ALTER TABLE `synclog` DROP INDEX `idx_synclog_type_baf3f0`;
+        ALTER TABLE `actionlog` DROP INDEX `idx_actionlog_admin_i_1eca7f`;"""
@@ -0,0 +1,37 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `syncloghourly` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `type` VARCHAR(6) NOT NULL  COMMENT 'create: create\nupdate: update\ndelete: delete' DEFAULT 'create',
+    `count` INT NOT NULL  DEFAULT 0,
+    `hour` DATETIME(6) NOT NULL,
+    `sync_id` INT NOT NULL,
+    UNIQUE KEY `uid_syncloghour_sync_id_4282a0` (`sync_id`, `type`, `hour`),
+    CONSTRAINT `fk_synclogh_sync_e14c8386` FOREIGN KEY (`sync_id`) REFERENCES `sync` (`id`) ON DELETE CASCADE,
+    KEY `idx_syncloghour_hour_d8e5d7` (`hour`)
+) CHARACTER SET utf8mb4;
+        CREATE TABLE IF NOT EXISTS `synclogdaily` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `type` VARCHAR(6) NOT NULL  COMMENT 'create: create\nupdate: update\ndelete: delete' DEFAULT 'create',
+    `count` INT NOT NULL  DEFAULT 0,
+    `date` DATE NOT NULL,
+    `sync_id` INT NOT NULL,
+    UNIQUE KEY `uid_synclogdail_sync_id_65b4f7` (`sync_id`, `type`, `date`),
+    CONSTRAINT `fk_synclogd_sync_bfe29c44` FOREIGN KEY (`sync_id`) REFERENCES `sync` (`id`) ON DELETE CASCADE,
+    KEY `idx_synclogdail_date_19dacf` (`date`)
+) CHARACTER SET utf8mb4;
+        ALTER TABLE `synclog` ADD INDEX `idx_synclog_created_eb7bbd` (`created_at`);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `synclog` DROP INDEX `idx_synclog_created_eb7bbd`;
+        DROP TABLE IF EXISTS `synclogdaily`;
+        DROP TABLE IF EXISTS `syncloghourly`;"""
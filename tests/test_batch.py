@@ -0,0 +1,58 @@
+from meilisync_admin.libs.batch import AdaptiveBatch
+
+
+def _batch(size: int = 100, interval: float = 1):
+    return AdaptiveBatch(
+        size=size,
+        interval=interval,
+        target_lag=4,
+        min_size=10,
+        max_size=1000,
+        max_interval=5,
+        backlog_threshold=10,
+    )
+
+
+def test_clamp_initial():
+    batch = _batch(size=1, interval=0)
+    assert batch.size == 10
+    assert batch.interval == 0.1
+    batch = _batch(size=10000, interval=10)
+    assert batch.size == 1000
+    # the interval is bounded by half the target lag as well
+    assert batch.interval == 2
+
+
+def test_grow_on_backlog():
+    batch = _batch()
+    for _ in range(10):
+        batch.observe(count=1, flush_seconds=0.1, lag=10, backlog=10)
+    assert batch.size == 1000
+    assert batch.interval == 2
+    assert batch.status()["batch_task_backlog"] == 10
+
+
+def test_shrink_on_lag():
+    batch = _batch()
+    # a fast insert keeps the size and only flushes sooner
+    batch.observe(count=100, flush_seconds=0.1, lag=5, backlog=0)
+    assert batch.size == 100
+    assert batch.interval == 0.5
+    for _ in range(10):
+        batch.observe(count=100, flush_seconds=3, lag=5, backlog=0)
+    assert batch.size == 10
+    assert batch.interval == 0.1
+
+
+def test_grow_only_full_batch():
+    batch = _batch()
+    batch.observe(count=50, flush_seconds=0.1, lag=1, backlog=0)
+    assert batch.size == 100
+    assert batch.interval == 1.25
+    for _ in range(20):
+        batch.observe(count=batch.size, flush_seconds=0.1, lag=1, backlog=0)
+    assert batch.size == 1000
+    assert batch.interval == 2
+    # a lag between half and the whole target keeps everything
+    batch.observe(count=1000, flush_seconds=0.1, lag=3, backlog=0)
+    assert batch.size == 1000
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from meilisync_admin.libs.breaker import BreakerState, CircuitBreaker
+
+
+def _breaker():
+    return CircuitBreaker(threshold=3, timeout=300, backoff_base=1, backoff_max=60)
+
+
+def test_backoff_then_open():
+    breaker = _breaker()
+    delays = [breaker.failure(Exception("down")) for _ in range(2)]
+    assert breaker.state == BreakerState.backing_off
+    assert 0.5 <= delays[0] <= 1
+    assert 1 <= delays[1] <= 2
+    assert 150 <= breaker.failure(Exception("down")) <= 300
+    assert breaker.state == BreakerState.open
+    assert breaker.status()["failures"] == 3
+    assert breaker.status()["last_error"] == "Exception('down')"
+
+
+def test_success():
+    breaker = _breaker()
+    breaker.failure(Exception("down"))
+    breaker.success()
+    assert breaker.state == BreakerState.running
+    assert breaker.next_retry_at is None
+
+
+def test_long_run_resets_failures():
+    breaker = _breaker()
+    with mock.patch("time.time", return_value=1000):
+        breaker.failure(Exception("down"))
+        breaker.failure(Exception("down"))
+        breaker.success()
+    with mock.patch("time.time", return_value=1100):
+        breaker.failure(Exception("down"))
+    assert breaker.failures == 1
+    assert breaker.state == BreakerState.backing_off
+
+
+def test_failed_startups_open_after_long_run():
+    breaker = _breaker()
+    with mock.patch("time.time", return_value=1000):
+        breaker.success()
+    # the runner never starts again, so the count must keep growing
+    with mock.patch("time.time", return_value=2000):
+        for _ in range(3):
+            breaker.failure(Exception("down"))
+    assert breaker.failures == 3
+    assert breaker.state == BreakerState.open
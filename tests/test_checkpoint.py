@@ -0,0 +1,64 @@
+import asyncio
+from unittest import mock
+
+from meilisync_admin.libs.checkpoint import Checkpointer
+
+
+class _Progress:
+    def __init__(self):
+        self.saved = []
+        self.fail = False
+
+    async def set(self, **kwargs):
+        if self.fail:
+            raise ConnectionError("down")
+        self.saved.append(kwargs)
+
+
+def _checkpointer():
+    progress = _Progress()
+    return progress, Checkpointer(progress, interval=10, max_events=3)  # type: ignore
+
+
+def test_flush_on_max_events():
+    async def main():
+        progress, checkpointer = _checkpointer()
+        await checkpointer.mark({"pos": 1})
+        assert progress.saved == []
+        await checkpointer.mark({"pos": 3}, events=2)
+        assert progress.saved == [{"pos": 3}]
+        assert checkpointer.pending is None
+        assert checkpointer.pending_events == 0
+
+    asyncio.run(main())
+
+
+def test_flush_on_interval():
+    async def main():
+        progress, checkpointer = _checkpointer()
+        with mock.patch("time.monotonic", return_value=checkpointer.last_flush_at + 10):
+            await checkpointer.mark({"pos": 1})
+        assert progress.saved == [{"pos": 1}]
+
+    asyncio.run(main())
+
+
+def test_keep_pending_on_failure():
+    async def main():
+        progress, checkpointer = _checkpointer()
+        await checkpointer.mark({"pos": 1})
+        progress.fail = True
+        try:
+            await checkpointer.flush()
+        except ConnectionError:
+            pass
+        assert checkpointer.pending == {"pos": 1}
+        assert checkpointer.pending_events == 1
+        progress.fail = False
+        await checkpointer.mark({"pos": 2})
+        await checkpointer.flush()
+        assert progress.saved == [{"pos": 2}]
+        await checkpointer.flush()
+        assert progress.saved == [{"pos": 2}]
+
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import datetime
+import decimal
+import json
+import math
+import uuid
+
+from meilisearch_python_sdk.json_handler import OrjsonHandler
+from meilisync.enums import EventType
+from meilisync.schemas import Event, ProgressEvent
+from meilisync.settings import Sync
+
+from meilisync_admin.libs.event import (
+    CoalescingEventCollection,
+    SharedEvent,
+    coalesce,
+    decode_event,
+    encode_document,
+    encode_event,
+)
+
+
+def _event():
+    return Event(
+        type="create",
+        table="t",
+        data={
+            "id": 1,
+            "created_at": datetime.datetime(2020, 1, 1),
+            "meta": {
+                "updated_at": datetime.datetime(2020, 1, 2, 3, 4, 5),
+                "dates": [datetime.date(2020, 1, 3)],
+                "at": datetime.time(1, 2),
+            },
+            "uid": uuid.UUID(int=1),
+            "score": float("nan"),
+        },
+    )
+
+
+def test_encode_document():
+    document = json.loads(encode_document(_event(), None, OrjsonHandler()))
+    assert document["created_at"] == int(datetime.datetime(2020, 1, 1).timestamp())
+    assert document["meta"] == {
+        "updated_at": "2020-01-02T03:04:05",
+        "dates": ["2020-01-03"],
+        "at": "01:02:00",
+    }
+    assert document["uid"] == str(uuid.UUID(int=1))
+    assert document["score"] is None
+
+
+def test_encode_shared_document_once():
+    event = SharedEvent.share(_event())
+    json_handler = OrjsonHandler()
+    fields = {"id": None, "meta": "info"}
+    document = event.encode(fields, json_handler)
+    assert event.encode(dict(fields), json_handler) is document
+    assert json.loads(document)["info"]["dates"] == ["2020-01-03"]
+    assert event.encode(None, json_handler) is not document
+
+
+def test_spooled_event_round_trip():
+    event = _event()
+    event.data.update(
+        price=decimal.Decimal("1.10"),
+        paid_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+        duration=datetime.timedelta(hours=1, microseconds=5),
+        raw=b"\x00\xff",
+        tags={"a", "b"},
+    )
+    event.progress = {"master_log_file": "binlog.000001", "master_log_position": 4}
+    decoded = decode_event(encode_event(event))
+    assert isinstance(decoded, Event)
+    assert decoded.type == event.type
+    assert decoded.progress == event.progress
+    assert math.isnan(decoded.data.pop("score"))
+    event.data.pop("score")
+    assert decoded.data == event.data
+
+
+def test_spooled_progress_event():
+    decoded = decode_event(encode_event(ProgressEvent(progress={"start_lsn": "0/1"})))
+    assert type(decoded) is ProgressEvent
+    assert decoded.progress == {"start_lsn": "0/1"}
+
+
+def _change(type_: str, **data):
+    return Event(type=type_, table="t", data={"id": 1, **data})
+
+
+def test_coalesce():
+    table = [
+        ("create", "update", "create"),
+        ("create", "delete", "delete"),
+        ("update", "update", "update"),
+        ("update", "delete", "delete"),
+        ("update", "create", "create"),
+        ("delete", "create", "create"),
+        ("delete", "update", "update"),
+        ("delete", "delete", "delete"),
+    ]
+    for previous, event, expected in table:
+        assert coalesce(_change(previous), _change(event)).type == EventType(expected)
+
+
+def test_coalesce_merges_updates():
+    event = coalesce(_change("create", a=1, b=1), _change("update", b=2, c=2))
+    assert event.data == {"id": 1, "a": 1, "b": 2, "c": 2}
+    event = coalesce(_change("delete", a=1), _change("update", b=2))
+    assert event.data == {"id": 1, "b": 2}
+
+
+def test_coalescing_collection():
+    sync = Sync(table="t", pk="id")
+    collection = CoalescingEventCollection()
+    collection.add_event(sync, _change("create", a=1))
+    collection.add_event(sync, _change("update", a=2))
+    collection.add_event(sync, Event(type="delete", table="t", data={"id": 2}))
+    assert collection.size == 2
+    assert collection.dedup_ratio == round(1 / 3, 4)
+    created, updated, deleted = collection.pop_events
+    assert [event.data for event in created[sync]] == [{"id": 1, "a": 2}]
+    assert updated[sync] == []
+    assert [event.data for event in deleted[sync]] == [{"id": 2}]
@@ -0,0 +1,32 @@
+from collections import Counter
+
+from meilisync_admin.libs.hash_ring import HashRing
+
+KEYS = [str(i) for i in range(1000)]
+
+
+def test_empty():
+    assert HashRing([]).get("1") is None
+
+
+def test_balance():
+    ring = HashRing(["a", "b", "c"])
+    counter = Counter(ring.get(key) for key in KEYS)
+    assert set(counter) == {"a", "b", "c"}
+    assert all(count > len(KEYS) / 3 * 0.7 for count in counter.values())
+
+
+def test_node_join():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    moved = [key for key in KEYS if before.get(key) != after.get(key)]
+    # only the sources taken by the new node change owner
+    assert moved
+    assert all(after.get(key) == "d" for key in moved)
+    assert len(moved) < len(KEYS) / 2
+
+
+def test_node_order():
+    assert [HashRing(["a", "b", "c"]).get(key) for key in KEYS] == [
+        HashRing(["c", "a", "b"]).get(key) for key in KEYS
+    ]
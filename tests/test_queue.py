@@ -0,0 +1,49 @@
+import asyncio
+
+from meilisync.schemas import Event, ProgressEvent
+
+from meilisync_admin.libs.queue import EventQueue, get_event_size
+
+
+def test_block_on_bytes():
+    async def main():
+        queue = EventQueue(max_size=100, max_bytes=10)
+        await queue.put("a", 6)
+        put = asyncio.create_task(queue.put("b", 6))
+        await asyncio.sleep(0.01)
+        assert not put.done()
+        assert queue.stats()["bytes"] == 6
+        assert await queue.get() == ("a", 6)
+        await asyncio.wait_for(put, 1)
+        assert queue.stats()["bytes"] == 6
+        assert queue.stats()["max_depth"] == 1
+
+    asyncio.run(main())
+
+
+def test_block_on_size():
+    async def main():
+        queue = EventQueue(max_size=1, max_bytes=100)
+        await queue.put("a", 1)
+        put = asyncio.create_task(queue.put("b", 1))
+        await asyncio.sleep(0.01)
+        assert not put.done()
+        await queue.get()
+        await asyncio.wait_for(put, 1)
+
+    asyncio.run(main())
+
+
+def test_accept_large_item():
+    async def main():
+        queue = EventQueue(max_size=100, max_bytes=10)
+        await asyncio.wait_for(queue.put("a", 100), 1)
+        assert queue.stats()["max_bytes"] == 100
+
+    asyncio.run(main())
+
+
+def test_event_size():
+    progress = ProgressEvent(progress={"pos": 1})
+    event = Event(type="create", table="t", data={"id": 1, "text": "a" * 1000})
+    assert get_event_size(event) > 1000 > get_event_size(progress)